@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from aiohttp import web, BodyPartReader
+from dotenv import load_dotenv
+from blockchain import load_contract
+from cache import CachedVerifier
+from bloom import issued_id_filter
+from revocations import revocation_set
+from ipfs import hash_stream
+from metrics import render_prometheus, inc, observe
+
+API_HOST = "0.0.0.0"
+API_PORT = 8502
+MAX_BATCH = 1000
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+CERT_ID_PATTERN = re.compile(r"^(0x)?[0-9a-fA-F]{64}$")
+# Windows has no SO_REUSEPORT, so there only one process can listen on the port.
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT")
+
+verifier_key = web.AppKey("verifier", CachedVerifier)
+
+
+def _check_id(cert_id: str) -> str:
+    if not CERT_ID_PATTERN.match(cert_id):
+        raise web.HTTPBadRequest(text=f"Invalid certificate ID: {cert_id}")
+    return cert_id.removeprefix("0x").lower()
+
+
+class _BlockingBody:
+    """File-like view of an aiohttp body for hash_stream, which reads it from a worker thread."""
+
+    def __init__(self, body, loop: asyncio.AbstractEventLoop):
+        self._read = body.read_chunk if isinstance(body, BodyPartReader) else body.read
+        self._loop = loop
+
+    def read(self, size: int) -> bytes:
+        return asyncio.run_coroutine_threadsafe(self._read(size), self._loop).result()
+
+
+async def _hash_body(body) -> str:
+    """SHA-256 certificate ID of a request body or multipart part, hashed chunk by chunk off the event loop."""
+    stream = _BlockingBody(body, asyncio.get_running_loop())
+    return (await asyncio.to_thread(hash_stream, stream)).certificate_id
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "cache": request.app[verifier_key].stats()})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    # Per worker process: each scrape reaches whichever worker accepts the connection.
+    return web.Response(text=render_prometheus(), content_type="text/plain")
+
+
+@web.middleware
+async def count_requests(request: web.Request, handler):
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource else "unmatched"
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        inc("api_requests", route=route, status=status)
+        observe("api_request", time.perf_counter() - start, route=route)
+
+
+async def get_certificate(request: web.Request) -> web.Response:
+    cert_id = _check_id(request.match_info["cert_id"])
+    cert = await asyncio.to_thread(request.app[verifier_key].verify, cert_id)
+    return web.json_response(cert, status=200 if cert["exists"] else 404)
+
+
+async def verify_pdf(request: web.Request) -> web.Response:
+    """Hashes the PDF sent as the request body and looks its ID up on-chain."""
+    cert_id = await _hash_body(request.content)
+    cert = await asyncio.to_thread(request.app[verifier_key].verify, cert_id)
+    return web.json_response(cert, status=200 if cert["exists"] else 404)
+
+
+async def verify_batch(request: web.Request) -> web.Response:
+    """Accepts {"ids": [...]} as JSON or several PDFs as multipart/form-data."""
+    if request.content_type == "multipart/form-data":
+        cert_ids = []
+        reader = await request.multipart()
+        async for part in reader:
+            if len(cert_ids) == MAX_BATCH:
+                # Reject before hashing anything past the limit.
+                raise web.HTTPRequestEntityTooLarge(max_size=MAX_BATCH, actual_size=MAX_BATCH + 1)
+            cert_ids.append(await _hash_body(part))
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Expected a JSON body with an 'ids' list")
+        if not isinstance(payload, dict) or not isinstance(payload.get("ids"), list):
+            raise web.HTTPBadRequest(text="Expected a JSON body with an 'ids' list")
+        cert_ids = [_check_id(str(cert_id)) for cert_id in payload["ids"]]
+
+    if len(cert_ids) > MAX_BATCH:
+        raise web.HTTPRequestEntityTooLarge(max_size=MAX_BATCH, actual_size=len(cert_ids))
+    certs = await asyncio.to_thread(request.app[verifier_key].verify_many, cert_ids)
+    return web.json_response({"found": sum(cert["exists"] for cert in certs), "certificates": certs})
+
+
+def create_app(contract=None) -> web.Application:
+    """Builds the API around one CachedVerifier shared by every request in this process."""
+    if contract is None:
+        contract = load_contract()[1]
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES, middlewares=[count_requests])
+    app[verifier_key] = CachedVerifier(
+        contract, id_filter=issued_id_filter(contract), revocations=revocation_set(contract)
+    )
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/metrics", metrics),
+        web.get("/certificates/{cert_id}", get_certificate),
+        web.post("/verify", verify_pdf),
+        web.post("/verify/batch", verify_batch),
+    ])
+    return app
+
+
+def serve(host: str = API_HOST, port: int = API_PORT) -> None:
+    load_dotenv()
+    # reuse_port lets every worker bind the same port; the kernel spreads connections across them.
+    web.run_app(create_app(), host=host, port=port, reuse_port=REUSE_PORT, print=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON HTTP API for certificate verification.")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    if not REUSE_PORT and args.workers > 1:
+        print("⚠️ This platform cannot share a port between processes; starting a single worker.")
+        args.workers = 1
+
+    workers = [
+        multiprocessing.Process(target=serve, args=(args.host, args.port), daemon=True)
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    print(f"🚀 Verification API on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
@@ -1,10 +1,23 @@
+import time
+
+RERUN_START = time.perf_counter()
+
 import streamlit as st
-from web3 import Web3, HTTPProvider
 import os
-import json
 from dotenv import load_dotenv
 from datetime import datetime
-from ipfs import generate_certificate, generate_certificate_id, upload_to_pinata
+from ipfs import hash_stream
+from storage import get_storage
+from pdfcache import PdfCache
+from blockchain import load_contract, revoke_calls, CONTRACT_JSON
+from txmanager import TransactionManager, CONFIRMED, DONE_STATES
+from cache import CachedVerifier
+from bloom import issued_id_filter
+from revocations import revocation_set, plan_revocation
+from indexer import CertificateIndex
+from batch import load_roster
+from jobs import JobQueue, ISSUE_JOB, BATCH_JOB, QUEUED, RUNNING, FAILED
+from metrics import timed, observe, serve_metrics
 import base64
 
 
@@ -14,29 +27,130 @@ def back_to_home_button():
         st.rerun()
 
 
+class RerunTimer:
+    """Splits each rerun's wall time into phases; set APP_TIMINGS=1 to print them and show them in the sidebar."""
+
+    def __init__(self, start: float):
+        self.last = start
+        self.phases = {}
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = (now - self.last) * 1000
+        self.last = now
+
+    def report(self) -> None:
+        total = sum(self.phases.values())
+        observe("streamlit_rerun", total / 1000, page=st.session_state.get("page"))
+        if os.getenv("APP_TIMINGS") == "1":
+            line = ", ".join(f"{phase} {ms:.1f}ms" for phase, ms in self.phases.items())
+            print(f"⏱️ Rerun {st.session_state.get('page')}: {total:.1f}ms ({line})")
+            history = st.session_state.setdefault("rerun_timings", [])
+            history.append(total)
+            del history[:-50]
+            with st.sidebar.expander("⏱️ Rerun timings", expanded=True):
+                st.caption(f"This rerun: {total:.1f}ms ({line})")
+                st.caption(f"Last {len(history)} reruns: avg {sum(history) / len(history):.1f}ms")
+
+
+timer = RerunTimer(RERUN_START)
+timer.mark("imports")
+
+
+@st.cache_data
+def image_base64(path, mtime):
+    # Keyed on mtime so replacing an image is picked up without a restart.
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def load_image_base64(path):
+    if not os.path.exists(path):
+        return None
+    return image_base64(path, os.path.getmtime(path))
+
+
+@st.cache_resource
+def get_contract(contract_address, abi_mtime):
+    # Rebuilt only when the address in .env or the compiled artifact changes.
+    return load_contract()
+
+
 # Load environment variables
 load_dotenv()
 
 # Web3 setup
-provider = HTTPProvider("http://127.0.0.1:8545", request_kwargs={"timeout": 60})
-w3 = Web3(provider)
-
-# Load ABI
 try:
-    with open('build/contracts/CertificateRegistry.json') as f:
-        contract_data = json.load(f)
-        contract_abi = contract_data['abi']
+    w3, contract = get_contract(os.getenv("CONTRACT_ADDRESS"), os.path.getmtime(CONTRACT_JSON))
 except FileNotFoundError:
     st.error("Missing ABI JSON. Run `truffle compile` first.")
     st.stop()
-
-# Load Contract Address
-contract_address = os.getenv("CONTRACT_ADDRESS")
-if not contract_address:
-    st.error("Missing CONTRACT_ADDRESS in .env")
+except EnvironmentError as e:
+    st.error(str(e))
     st.stop()
 
-contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=contract_abi)
+
+@st.cache_resource
+def get_verifier(contract_address):
+    # Shared by every session so repeated checks of the same ID skip the node.
+    return CachedVerifier(contract, id_filter=issued_id_filter(contract),
+                          revocations=revocation_set(contract))
+
+
+verifier = get_verifier(contract.address)
+
+
+@st.cache_resource
+def get_index(contract_address):
+    return CertificateIndex(contract)
+
+
+@st.cache_resource
+def get_tx_manager(contract_address):
+    # One manager per process so every session draws nonces from the same counter.
+    return TransactionManager(w3).start()
+
+
+def connected_tx_manager():
+    """The shared TransactionManager, created on first use; None (with an error shown) if the node is down."""
+    try:
+        return get_tx_manager(contract.address)
+    except Exception as e:
+        # Not cached on failure, so the next rerun tries again.
+        st.error(f"❌ Cannot reach the blockchain node to send transactions: {e}")
+        return None
+
+
+storage = get_storage()
+
+
+@st.cache_resource
+def get_job_queue():
+    # Issuance runs in `python jobs.py` worker processes; the app only enqueues and reads progress.
+    return JobQueue()
+
+
+job_queue = get_job_queue()
+
+
+@st.cache_resource
+def get_pdf_cache(backend):
+    # Verified PDFs and previews on local disk, so repeat views skip the gateway.
+    return PdfCache(storage.get)
+
+
+pdf_cache = get_pdf_cache(storage.name)
+
+
+@st.cache_resource
+def start_metrics_server(port):
+    # Prometheus scrapes this process's counters and latency histograms from /metrics.
+    return serve_metrics(port)
+
+
+if os.getenv("METRICS_PORT"):
+    start_metrics_server(int(os.getenv("METRICS_PORT")))
+timer.mark("setup")
 
 # --- Styling ---
 st.markdown("""
@@ -106,8 +220,8 @@ def show_home():
     verifier_image_path = "images/verifier.png"
 
     with col1:
-        if os.path.exists(admin_image_path):
-            admin_img_base64 = base64.b64encode(open(admin_image_path, "rb").read()).decode()
+        admin_img_base64 = load_image_base64(admin_image_path)
+        if admin_img_base64:
             st.markdown(f"""
                 <div style="text-align:center">
                     <img src="data:image/png;base64,{admin_img_base64}" width="130" />
@@ -125,8 +239,8 @@ def show_home():
         st.markdown("</div>", unsafe_allow_html=True)
 
     with col2:
-        if os.path.exists(verifier_image_path):
-            verifier_img_base64 = base64.b64encode(open(verifier_image_path, "rb").read()).decode()
+        verifier_img_base64 = load_image_base64(verifier_image_path)
+        if verifier_img_base64:
             st.markdown(f"""
                 <div style="text-align:center">
                     <img src="data:image/png;base64,{verifier_img_base64}" width="130" />
@@ -248,10 +362,42 @@ def show_admin_dashboard():
         st.session_state.page = "admin_generate"
         st.rerun()
 
+    if st.button("📚 Batch Issue"):
+        st.session_state.page = "admin_batch"
+        st.rerun()
+
     if st.button("🔍 Verify Certificate"):
         st.session_state.page = "admin_verify"
         st.rerun()
 
+    if st.button("🗂️ Certificate Index"):
+        st.session_state.page = "admin_index"
+        st.rerun()
+
+    if st.button("📡 Transactions"):
+        st.session_state.page = "admin_transactions"
+        st.rerun()
+
+    if st.button("🧵 Jobs"):
+        st.session_state.page = "admin_jobs"
+        st.rerun()
+
+    if st.button("🚫 Revoke Certificates"):
+        st.session_state.page = "admin_revoke"
+        st.rerun()
+
+    stats = verifier.stats()
+    st.caption(
+        f"Verification cache: {stats['size']} entries, {stats['hits']} hits / {stats['misses']} misses "
+        f"({stats['hit_ratio']:.0%} hit ratio), {stats['invalidations']} invalidated by events, "
+        f"{stats.get('revoked', 0)} revoked IDs tracked"
+    )
+    if "bloom" in stats:
+        st.caption(
+            f"Issued-ID filter: {stats['bloom']['ids']} IDs in {stats['bloom']['bytes'] / 1024:.0f} KiB, "
+            f"{stats['bloom']['rejections']} unknown IDs rejected without a chain call"
+        )
+
     back_to_home_button()
 
 # --- Generate Certificate UI ---
@@ -266,41 +412,228 @@ def generate_certificate_ui():
         submitted = st.form_submit_button("Generate")
 
     if submitted:
-        os.makedirs("certificates", exist_ok=True)
-        temp_pdf_path = "certificates/temp.pdf"
-        logo_path = "images/Cairo_University.png"
+        try:
+            # Rendering, pinning and the transaction run in a worker; this session is free right away.
+            job_id = job_queue.submit(ISSUE_JOB, {"uid": uid, "name": name, "course": course, "org": org})
+            st.success(f"✅ Queued as job #{job_id}; follow it on the Jobs page.")
+            warn_if_no_workers()
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+    back_to_home_button()
+
+
+def warn_if_no_workers():
+    if not job_queue.workers():
+        st.warning("⚠️ No job worker is running, so queued jobs will wait. Start one with `python jobs.py`.")
+
+# --- Batch Issue UI ---
+def batch_issue_ui():
+    st.title("📚 Batch Issue")
+    st.caption("Upload a CSV or JSON roster with uid, name, course and org columns.")
+
+    roster_file = st.file_uploader("Roster", type=["csv", "json"])
+    merkle = st.checkbox("🌳 Anchor the whole roster under one Merkle root (one transaction)")
+    if roster_file and st.button("🚀 Issue Batch"):
+        os.makedirs("temp", exist_ok=True)
+        # Named by content, so admins uploading different rosters under one file name never
+        # share a roster or status file, while re-uploading the same roster still resumes it.
+        roster_file.seek(0)
+        extension = os.path.splitext(roster_file.name)[1].lower()
+        roster_path = os.path.join("temp", f"roster-{hash_stream(roster_file).certificate_id[:16]}{extension}")
+        with open(roster_path, "wb") as f:
+            f.write(roster_file.getvalue())
 
         try:
-            generate_certificate(temp_pdf_path, uid, name, course, logo_path)
-            cert_id = generate_certificate_id(temp_pdf_path)
-            final_pdf_path = f"certificates/{cert_id}.pdf"
-            os.rename(temp_pdf_path, final_pdf_path)
-            cid = upload_to_pinata(final_pdf_path)
+            roster = load_roster(roster_path)
+        except ValueError as e:
+            st.error(f"❌ Invalid roster: {e}")
+            back_to_home_button()
+            return
+
+        # Re-uploading the same roster resumes from its status file.
+        job_id = job_queue.submit(BATCH_JOB, {
+            "roster_path": os.path.abspath(roster_path),
+            "status_path": os.path.abspath(f"{roster_path}.status.json"),
+            "merkle": merkle,
+        })
+        st.success(f"✅ {len(roster)} rows queued as job #{job_id}; follow it on the Jobs page.")
+        warn_if_no_workers()
+    back_to_home_button()
 
-            st.success("✅ Certificate generated!")
-            
-            dark_green = "#104e3e"
-            st.markdown(f"<b>🆔 ID:</b> <span style='color:{dark_green}'>{cert_id}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>👤 Name:</b> <span style='color:{dark_green}'>{name}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>📚 Course:</b> <span style='color:{dark_green}'>{course}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>🏢 Organization:</b> <span style='color:{dark_green}'>{org}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>🔗 IPFS:</b> <span style='color:{dark_green}'>{cid}</span>", unsafe_allow_html=True)
+# --- Certificate Index UI ---
+def certificate_index_ui():
+    st.title("🗂️ Certificate Index")
+    index = get_index(contract.address)
 
+    if st.button("🔄 Sync from Blockchain"):
+        try:
+            seen = index.sync()
+            st.success(f"✅ Indexed {seen} new events")
+        except Exception as e:
+            st.error(f"❌ Blockchain error: {e}")
 
-            if cid != "Unavailable":
-                st.markdown(f"[🔗 View on IPFS](https://gateway.pinata.cloud/ipfs/{cid})")
+    st.caption(
+        f"{index.count()} certificates indexed ({index.count(revoked=True)} revoked), "
+        f"synced to block {index.last_block()}"
+    )
+
+    with st.form("Search"):
+        uid = st.text_input("UID")
+        name = st.text_input("Candidate Name")
+        course = st.text_input("Course Name")
+        submitted = st.form_submit_button("Search")
+
+    if submitted:
+        rows = index.search(uid.strip() or None, name.strip() or None, course.strip() or None)
+        if rows:
+            st.dataframe(rows, use_container_width=True)
+        else:
+            st.info("No matching certificates.")
+    back_to_home_button()
+
+# --- Transactions UI ---
+def transactions_ui():
+    st.title("📡 Transactions")
+    if st.button("🔄 Refresh"):
+        st.rerun()
+
+    tx_manager = connected_tx_manager()
+    if tx_manager is None:
+        back_to_home_button()
+        return
+    recent = tx_manager.recent(limit=200)
+    pending = sum(1 for tx in recent if tx["status"] not in DONE_STATES)
+    st.caption(f"{pending} pending of the last {len(recent)} transactions sent by this app process")
+    st.caption("Issuance transactions are sent by the job workers; see the Jobs page.")
+    if recent:
+        st.dataframe(recent, use_container_width=True)
+    else:
+        st.info("No transactions submitted yet.")
+    back_to_home_button()
+
+# --- Jobs UI ---
+def job_subject(job):
+    payload = job["payload"]
+    if job["kind"] == BATCH_JOB:
+        return os.path.basename(payload["roster_path"]) + (" (Merkle)" if payload.get("merkle") else "")
+    return f"{payload['name']} / {payload['course']}"
 
-            sender = w3.eth.accounts[0]
-            tx_hash = contract.functions.issueCertificate(
-                cert_id, cid, uid, name, course, org
-            ).transact({"from": sender})
-            st.success("📦 Issued on Blockchain!")
-            
 
+def job_progress(job):
+    progress = job["progress"] or {}
+    if "stage" in progress:
+        return progress["stage"] if job["status"] == RUNNING else ""
+    return ", ".join(f"{state} {count}" for state, count in progress.items() if state != "rows")
+
+
+def jobs_ui():
+    st.title("🧵 Jobs")
+    if st.button("🔄 Refresh"):
+        st.rerun()
+
+    workers = job_queue.workers()
+    jobs = job_queue.recent(limit=200)
+    st.caption(
+        f"{len(workers)} workers running; {job_queue.count(QUEUED)} jobs queued, "
+        f"{job_queue.count(RUNNING)} running"
+    )
+    warn_if_no_workers()
+    if not jobs:
+        st.info("No jobs submitted yet.")
+        back_to_home_button()
+        return
+
+    now = time.time()
+    st.dataframe(
+        [
+            {
+                "Job": job["id"],
+                "Kind": job["kind"],
+                "Subject": job_subject(job),
+                "Status": job["status"] + (" (already issued)" if (job["result"] or {}).get("already_issued") else ""),
+                "Progress": job_progress(job),
+                "Certificate ID": (job["result"] or job["progress"] or {}).get("cert_id", ""),
+                "Error": job["error"] or "",
+                "Submitted": datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "Seconds": round((job["finished_at"] or now) - job["started_at"], 1) if job["started_at"] else None,
+            }
+            for job in jobs
+        ],
+        use_container_width=True,
+    )
+
+    failed = [job["id"] for job in jobs if job["status"] == FAILED]
+    if failed:
+        job_id = st.selectbox("Failed job", failed)
+        if st.button("🔁 Retry"):
+            job_queue.retry(job_id)
+            st.rerun()
+    back_to_home_button()
+
+# --- Revoke Certificates UI ---
+def revoke_certificates_ui():
+    st.title("🚫 Revoke Certificates")
+    st.caption("Look up one or many certificates, check the list, then revoke them all at once.")
+
+    uploaded_files = st.file_uploader("Upload PDFs", type=["pdf"], accept_multiple_files=True, key="revoke_files")
+    id_text = st.text_area("...or paste Certificate IDs (one per line)", key="revoke_ids")
+    if st.button("🔎 Look Up") and (uploaded_files or id_text.strip()):
+        try:
+            # A single batched lookup, whatever the number of IDs.
+            certs = verifier.verify_many(list(collect_certificate_ids(uploaded_files, id_text)))
+            st.session_state.revoke_plan = plan_revocation(certs)
         except Exception as e:
-            st.error(f"❌ Error: {e}")
+            st.error(f"❌ Blockchain error: {e}")
+
+    plan = st.session_state.get("revoke_plan")
+    if plan:
+        labels = {"revoke": "Will be revoked", "revoked": "Already revoked", "missing": "Not found"}
+        st.dataframe(
+            [
+                {"Certificate ID": cert["cert_id"], "Status": label, "Name": cert["name"],
+                 "Course": cert["course"], "Organization": cert["org"]}
+                for group, label in labels.items() for cert in plan[group]
+            ],
+            use_container_width=True,
+        )
+        if plan["revoke"] and st.button(f"🚫 Revoke {len(plan['revoke'])} Certificates"):
+            revoke_on_chain(plan["revoke"])
+            st.session_state.revoke_plan = None
     back_to_home_button()
 
+
+def revoke_on_chain(certs):
+    tx_manager = connected_tx_manager()
+    if tx_manager is None:
+        return
+    try:
+        # Sent from the contract owner, who may revoke any certificate; one transaction per 100 IDs.
+        calls = revoke_calls(contract, certs)
+        tx_ids = [
+            tx_manager.submit(call, label=f"revoke {i + 1}/{len(calls)}") for i, call in enumerate(calls)
+        ]
+        with st.spinner("⏳ Waiting for the revocation receipts..."):
+            txs = tx_manager.wait(tx_ids, timeout=10)
+    except Exception as e:
+        st.error(f"❌ Error: {e}")
+        return
+
+    confirmed = [tx for tx in txs if tx["status"] == CONFIRMED]
+    for tx in txs:
+        if tx["status"] in DONE_STATES and tx["status"] != CONFIRMED:
+            st.error(f"❌ Transaction {tx['status']}: {tx['error']}")
+    if len(confirmed) == len(txs):
+        st.success(f"✅ Revoked {len(certs)} certificates in {len(txs)} transaction(s)")
+        try:
+            # Pick the revocations up now rather than at the next periodic sync.
+            verifier.sync_events(force=True)
+        except Exception as e:
+            st.warning(f"⚠️ The local revocation set will catch up on the next sync: {e}")
+    elif all(tx["status"] in DONE_STATES for tx in txs):
+        st.warning(f"⚠️ {len(confirmed)} of {len(txs)} revocation transactions confirmed")
+    else:
+        st.info("📡 Revocations submitted; follow them on the Transactions page.")
+
 # --- Verify Certificate UI ---
 def verify_certificate_ui():
     st.markdown("""
@@ -333,7 +666,7 @@ def verify_certificate_ui():
         st.session_state.verify_method = None
 
     if not st.session_state.verify_method:
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("📄 Upload Certificate"):
                 st.session_state.verify_method = "upload"
@@ -342,17 +675,24 @@ def verify_certificate_ui():
             if st.button("🔢 Enter Certificate ID"):
                 st.session_state.verify_method = "id"
                 st.rerun()
+        with col3:
+            if st.button("📚 Verify Many"):
+                st.session_state.verify_method = "many"
+                st.rerun()
 
     elif st.session_state.verify_method == "upload":
         uploaded_file = st.file_uploader("Upload PDF", type=["pdf"])
         if uploaded_file:
             if st.button("✅ Verify"):
                 try:
-                    temp_path = os.path.join("temp", uploaded_file.name)
-                    os.makedirs("temp", exist_ok=True)
-                    with open(temp_path, "wb") as f:
-                        f.write(uploaded_file.read())
-                    cert_id = generate_certificate_id(temp_path)
+                    # Hash straight from the upload buffer in chunks, without copying it.
+                    uploaded_file.seek(0)
+                    result = hash_stream(uploaded_file)
+                    st.caption(
+                        f"Hashed {result.size / 1024:.1f} KB in {result.seconds * 1000:.1f} ms "
+                        f"({result.throughput / 1e6:.0f} MB/s)"
+                    )
+                    cert_id = result.certificate_id
                     verify_on_chain(cert_id)
                 except Exception as e:
                     st.error(f"Error verifying certificate: {e}")
@@ -371,37 +711,114 @@ def verify_certificate_ui():
             st.session_state.verify_method = None
             st.rerun()
 
+    elif st.session_state.verify_method == "many":
+        uploaded_files = st.file_uploader("Upload PDFs", type=["pdf"], accept_multiple_files=True)
+        id_text = st.text_area("...or paste Certificate IDs (one per line)")
+        if st.button("✅ Verify") and (uploaded_files or id_text.strip()):
+            try:
+                verify_many_on_chain(uploaded_files, id_text)
+            except Exception as e:
+                st.error(f"Error verifying certificates: {e}")
+        if st.button("🔁 Change Method"):
+            st.session_state.verify_method = None
+            st.rerun()
+
     back_to_home_button()
 
 
 # --- On-chain Verification Helper ---
 def verify_on_chain(cert_id): 
     try: 
-        cert = contract.functions.verifyCertificate(cert_id).call() 
-        exists = cert[0] 
-        if not exists: 
+        with timed("verify_lookup"):
+            cert = verifier.verify(cert_id)
+        if not cert["exists"]: 
             st.error("❌ Certificate does not exist") 
         else: 
-            st.success("✅ Certificate found!") 
+            if cert["revoked"]:
+                st.error("🚫 Certificate found, but it has been revoked")
+            else:
+                st.success("✅ Certificate found!") 
 
             dark_green = "#104e3e"
             st.markdown(f"<b>🆔 Certificate ID:</b> <span style='color:{dark_green}'>{cert_id}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>👤 Name:</b> <span style='color:{dark_green}'>{cert[2]}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>📚 Course:</b> <span style='color:{dark_green}'>{cert[3]}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>🏢 Organization:</b> <span style='color:{dark_green}'>{cert[4]}</span>", unsafe_allow_html=True)
-            st.markdown(f"<b>🔗 IPFS CID:</b> <span style='color:{dark_green}'>{cert[5]}</span>", unsafe_allow_html=True)
+            st.markdown(f"<b>👤 Name:</b> <span style='color:{dark_green}'>{cert['name']}</span>", unsafe_allow_html=True)
+            st.markdown(f"<b>📚 Course:</b> <span style='color:{dark_green}'>{cert['course']}</span>", unsafe_allow_html=True)
+            st.markdown(f"<b>🏢 Organization:</b> <span style='color:{dark_green}'>{cert['org']}</span>", unsafe_allow_html=True)
+            st.markdown(f"<b>🔗 IPFS CID:</b> <span style='color:{dark_green}'>{cert['cid']}</span>", unsafe_allow_html=True)
+            if cert.get("root"):
+                st.markdown(f"<b>🌳 Merkle Root:</b> <span style='color:{dark_green}'>{cert['root']}</span>", unsafe_allow_html=True)
 
             # Optional: direct link to certificate
-            st.markdown(f"[🔗 View on IPFS](https://gateway.pinata.cloud/ipfs/{cert[5]})", unsafe_allow_html=True)
-            ipfs_url = f"https://gateway.pinata.cloud/ipfs/{cert[5]}"
-            st.markdown(f"[Download Certificate from IPFS]({ipfs_url})")
-            google_viewer = f"https://docs.google.com/gview?embedded=true&url={ipfs_url}"
-            st.components.v1.iframe(google_viewer, height=600, width=800)
+            ipfs_url = storage.gateway_url(cert['cid'])
+            if ipfs_url:
+                st.markdown(f"[🔗 View on IPFS]({ipfs_url})", unsafe_allow_html=True)
+            show_certificate_preview(cert_id, cert['cid'])
             
     except Exception as e: 
         st.error(f"❌ Blockchain error: {e}")
     
 
+def show_certificate_preview(cert_id, cid):
+    """Renders the certificate from the local PDF cache instead of a remote viewer."""
+    try:
+        pdf_bytes = pdf_cache.get(cid)
+    except Exception as e:
+        st.warning(f"⚠️ Certificate file unavailable: {e}")
+        return
+
+    st.download_button("📥 Download Certificate", pdf_bytes, file_name=f"{cert_id}.pdf", mime="application/pdf")
+    with timed("verify_preview"):
+        thumbnail = pdf_cache.thumbnail(cid)
+    if thumbnail:
+        st.image(thumbnail, width=800)
+    else:
+        # Without PyMuPDF there is no PNG preview; many browsers refuse to show PDFs from data URIs.
+        st.caption("ℹ️ Install PyMuPDF (`pip install -r requirements.txt`) for an image preview; "
+                   "if the certificate does not show below, use the download button.")
+        pdf_base64 = base64.b64encode(pdf_bytes).decode()
+        st.markdown(
+            f'<iframe src="data:application/pdf;base64,{pdf_base64}" width="800" height="600"></iframe>',
+            unsafe_allow_html=True,
+        )
+
+
+def collect_certificate_ids(uploaded_files, id_text):
+    """Maps each certificate ID from the uploaded PDFs and pasted lines to where it came from."""
+    sources = {}
+    for uploaded_file in uploaded_files or []:
+        uploaded_file.seek(0)
+        sources.setdefault(hash_stream(uploaded_file).certificate_id, uploaded_file.name)
+    for line in id_text.splitlines():
+        if line.strip():
+            sources.setdefault(line.strip(), "ID")
+    return sources
+
+
+def verify_many_on_chain(uploaded_files, id_text):
+    sources = collect_certificate_ids(uploaded_files, id_text)
+
+    # One JSON-RPC batch covers hundreds of IDs; cached results skip the node entirely.
+    certs = verifier.verify_many(list(sources))
+    found = sum(cert["exists"] for cert in certs)
+    revoked = sum(cert["exists"] and cert["revoked"] for cert in certs)
+    st.success(f"✅ {found} of {len(certs)} certificates found" + (f", {revoked} of them revoked" if revoked else ""))
+    st.dataframe(
+        [
+            {
+                "Source": sources[cert["cert_id"]],
+                "Certificate ID": cert["cert_id"],
+                "Valid": ("🚫 Revoked" if cert["revoked"] else "✅") if cert["exists"] else "❌",
+                "Name": cert["name"],
+                "Course": cert["course"],
+                "Organization": cert["org"],
+                "IPFS CID": cert["cid"],
+            }
+            for cert in certs
+        ],
+        use_container_width=True,
+    )
+
+
 # --- Routing ---
 if st.session_state.page == "home":
     show_home()
@@ -419,6 +836,36 @@ elif st.session_state.page == "admin_generate":
     else:
         st.session_state.page = "login"
         st.rerun()
+elif st.session_state.page == "admin_batch":
+    if st.session_state.admin_logged_in:
+        batch_issue_ui()
+    else:
+        st.session_state.page = "login"
+        st.rerun()
+elif st.session_state.page == "admin_index":
+    if st.session_state.admin_logged_in:
+        certificate_index_ui()
+    else:
+        st.session_state.page = "login"
+        st.rerun()
+elif st.session_state.page == "admin_transactions":
+    if st.session_state.admin_logged_in:
+        transactions_ui()
+    else:
+        st.session_state.page = "login"
+        st.rerun()
+elif st.session_state.page == "admin_jobs":
+    if st.session_state.admin_logged_in:
+        jobs_ui()
+    else:
+        st.session_state.page = "login"
+        st.rerun()
+elif st.session_state.page == "admin_revoke":
+    if st.session_state.admin_logged_in:
+        revoke_certificates_ui()
+    else:
+        st.session_state.page = "login"
+        st.rerun()
 elif st.session_state.page == "admin_verify": 
     if st.session_state.admin_logged_in: 
         verify_certificate_ui()
@@ -427,3 +874,6 @@ elif st.session_state.page == "admin_verify":
         st.rerun()
 elif st.session_state.page == "guest_verify":
     verify_certificate_ui()
+
+timer.mark("page")
+timer.report()
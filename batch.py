@@ -0,0 +1,336 @@
+import os
+import csv
+import json
+import argparse
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from ipfs import (render_certificate_with_id, save_certificate, certificate_content_hash, warm_renderer,
+                  UploadQueue, PinIndex)
+from cid import compute_cid
+from storage import get_storage
+from blockchain import load_contract, issue_call, merkle_batch, anchor_call
+from merkle import ProofStore
+from txmanager import TransactionManager, CONFIRMED
+
+ROSTER_FIELDS = ("uid", "name", "course", "org")
+CERT_DIR = "certificates"
+LOGO_PATH = "images/Cairo_University.png"
+
+# Row status progression; a resumed run restarts each row after its last completed stage.
+PENDING, RENDERED, UPLOADED, ISSUED, FAILED = "pending", "rendered", "uploaded", "issued", "failed"
+SAVE_INTERVAL = 1.0
+
+
+def load_roster(path: str) -> list:
+    """Reads a CSV or JSON roster into a list of {uid, name, course, org} rows."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+
+    roster = []
+    for i, row in enumerate(rows, start=1):
+        missing = [field for field in ROSTER_FIELDS if not str(row.get(field, "")).strip()]
+        if missing:
+            raise ValueError(f"Row {i} is missing {', '.join(missing)}")
+        roster.append({field: str(row[field]).strip() for field in ROSTER_FIELDS})
+    return roster
+
+
+def row_key(row: dict) -> str:
+    return f"{row['uid']}|{row['course']}"
+
+
+def render_row(row: dict, out_dir: str = CERT_DIR, logo_path: str = LOGO_PATH) -> tuple:
+    """Process-pool worker: renders and hashes one certificate in memory and saves it once.
+
+    Returns (status_fields, pdf_bytes) so the upload stage can reuse the buffer.
+    The IPFS CID is computed here too, so issuance does not wait for the pin.
+    With ``out_dir`` None nothing is written; a resumed run re-renders instead.
+    """
+    pdf_bytes, cert_id = render_certificate_with_id(row["uid"], row["name"], row["course"], logo_path)
+    path = save_certificate(cert_id, pdf_bytes, out_dir) if out_dir else None
+    return {"cert_id": cert_id, "path": path, "cid": compute_cid(pdf_bytes),
+            "content_hash": certificate_content_hash(row["uid"], row["name"], row["course"])}, pdf_bytes
+
+
+class BatchIssuer:
+    """Runs render -> hash -> (upload | issue) as overlapping stages over a roster.
+
+    Rendering fans out over a process pool and also computes each PDF's CID,
+    so the upload (through an UploadQueue) and the issuance (through a
+    TransactionManager) of a row run side by side. A row only counts as
+    issued once it is pinned and its receipt confirms. Per-row progress is
+    persisted to ``status_path`` so an interrupted run picks up where it
+    left off, redoing only the half that failed.
+
+    With ``merkle`` set, rows are only rendered and pinned; once the whole
+    roster is through, its certificates are anchored under a single Merkle
+    root in one transaction and their inclusion proofs go to ``proof_path``
+    (default: PROOF_DB or proofs.db, where verification looks them up).
+    """
+
+    def __init__(self, status_path: str, render_workers: int = None, upload_workers: int = 8,
+                 max_in_flight: int = 64, contract=None, sender: str = None, tx_manager=None, uploader=None,
+                 out_dir: str = CERT_DIR, logo_path: str = LOGO_PATH, on_update=None, merkle: bool = False,
+                 proof_path: str = None):
+        self.status_path = status_path
+        self.render_workers = render_workers or os.cpu_count() or 1
+        self.upload_workers = upload_workers
+        self.max_in_flight = max_in_flight
+        self.contract = contract
+        self.merkle = merkle and contract is not None
+        self.proof_path = proof_path
+        # Whether each row gets its own issuance transaction.
+        self.issue_each = contract is not None and not self.merkle
+        self.sender = sender
+        self.tx_manager = tx_manager
+        self.uploader = uploader
+        self.out_dir = out_dir
+        self.logo_path = logo_path
+        self.on_update = on_update
+        self.status = self._load_status()
+        self._pdfs = {}
+        self._parts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._done = threading.Semaphore(0)
+        self._last_save = 0.0
+
+    def _load_status(self) -> dict:
+        if os.path.exists(self.status_path):
+            with open(self.status_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def _save_status(self, force: bool = True) -> None:
+        # Rewriting the whole file per row update is quadratic on large rosters.
+        if not force and time.monotonic() - self._last_save < SAVE_INTERVAL:
+            return
+        self._last_save = time.monotonic()
+        temp_path = f"{self.status_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.status, f, indent=2)
+        os.replace(temp_path, self.status_path)
+
+    def _update(self, key: str, **fields) -> None:
+        with self._lock:
+            self.status[key].update(fields)
+            self._save_status(force=fields.get("status") == FAILED)
+            entry = dict(self.status[key])
+        if self.on_update:
+            self.on_update(key, entry)
+
+    def run(self, roster: list) -> dict:
+        """Processes every row that is not yet issued and returns the status map."""
+        for row in roster:
+            entry = self.status.setdefault(row_key(row), {"status": PENDING})
+            content_hash = certificate_content_hash(row["uid"], row["name"], row["course"])
+            if entry["status"] != ISSUED and entry.get("content_hash", content_hash) != content_hash:
+                # The row was edited since it was rendered; the old PDF must not be published.
+                entry.clear()
+                entry["status"] = PENDING
+            entry.update(row)
+            if entry["status"] == FAILED:
+                entry["status"] = entry.get("resume_from", PENDING)
+                entry.pop("error", None)
+        self._save_status()
+
+        pending = [row_key(row) for row in roster if self.status[row_key(row)]["status"] != ISSUED]
+        if not pending:
+            return self.status
+
+        if self.contract is not None and self.tx_manager is None:
+            self.tx_manager = TransactionManager(self.contract.w3, self.sender, self.max_in_flight)
+        if self.tx_manager is not None:
+            self.tx_manager.start()
+
+        own_uploader = self.uploader is None
+        if own_uploader:
+            storage = get_storage()
+            self.uploader = UploadQueue(self.upload_workers, upload=storage.add, index=PinIndex(backend=storage.name))
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.render_workers, initializer=warm_renderer,
+                                     initargs=(self.logo_path,)) as render_pool:
+                self._render_pool = render_pool
+                for key in pending:
+                    self._advance(key)
+                try:
+                    for _ in pending:
+                        self._done.acquire()
+                finally:
+                    with self._lock:
+                        self._save_status()
+            if self.merkle:
+                self._anchor([row_key(row) for row in roster])
+        finally:
+            if own_uploader:
+                self.uploader.shutdown(wait=False)
+                self.uploader = None
+        return self.status
+
+    def _anchor(self, keys: list) -> None:
+        """Anchors every pinned, not yet issued row under one Merkle root."""
+        keys = [key for key in keys if self.status[key]["status"] == UPLOADED]
+        if not keys:
+            return
+        rows = [self.status[key] for key in keys]
+        tree = merkle_batch(rows)
+        # Proofs are stored before the root goes out, so an anchored root never lacks them.
+        ProofStore(self.proof_path).add(tree, rows)
+        root = tree.root.hex()
+        tx_id = self.tx_manager.submit(anchor_call(self.contract, tree), label=f"root {root[:16]}")
+        tx = self.tx_manager.wait([tx_id])[0]
+        for key in keys:
+            if tx["status"] == CONFIRMED:
+                self._update(key, status=ISSUED, root=root, tx_hash=tx["tx_hash"], block=tx["block"])
+            else:
+                self._update(key, status=FAILED, resume_from=UPLOADED,
+                             error=tx["error"] or f"anchor transaction {tx['status']}")
+        with self._lock:
+            self._save_status()
+
+    def _advance(self, key: str) -> None:
+        """Schedules the next stage for a row based on its recorded status."""
+        entry = self.status[key]
+        state = entry["status"]
+        if state == PENDING:
+            row = {field: entry[field] for field in ROSTER_FIELDS}
+            future = self._render_pool.submit(render_row, row, self.out_dir, self.logo_path)
+            future.add_done_callback(lambda f: self._stage_done(key, f, PENDING, RENDERED))
+        elif state == RENDERED or (state == UPLOADED and self.issue_each):
+            if state == RENDERED and key not in self._pdfs and not os.path.exists(entry.get("path") or ""):
+                self._update(key, status=PENDING)
+                return self._advance(key)
+            self._publish(key)
+        else:
+            self._done.release()
+
+    def _publish(self, key: str) -> None:
+        """Starts the pin upload and the issuance of a rendered row concurrently."""
+        entry = self.status[key]
+        pin = entry["status"] == RENDERED
+        issue = self.issue_each and "block" not in entry
+        pdf_bytes = self._pdf_bytes(key) if pin or "cid" not in entry else None
+        if "cid" not in entry:
+            # Status file from before CIDs were computed locally.
+            self._update(key, cid=compute_cid(pdf_bytes))
+        with self._lock:
+            self._parts[key] = pin + issue
+        if not pin and not issue:
+            return self._part_done(key)
+
+        if pin:
+            future = self.uploader.submit(pdf_bytes, f"{entry['cert_id']}.pdf", entry["cid"])
+            future.add_done_callback(lambda f: self._pinned(key, f))
+        if issue:
+            try:
+                call = issue_call(self.contract, entry["cert_id"], entry["cid"],
+                                  entry["uid"], entry["name"], entry["course"], entry["org"])
+            except Exception as e:
+                return self._part_done(key, str(e))
+            self.tx_manager.submit(call, label=key, on_done=lambda tx: self._issued(key, tx))
+
+    def _pinned(self, key: str, future) -> None:
+        try:
+            future.result()
+        except Exception as e:
+            return self._part_done(key, str(e))
+        self._update(key, pinned=True)
+        self._part_done(key)
+
+    def _issued(self, key: str, tx: dict) -> None:
+        if tx["status"] != CONFIRMED:
+            return self._part_done(key, tx["error"] or f"transaction {tx['status']}")
+        self._update(key, tx_hash=tx["tx_hash"], block=tx["block"])
+        self._part_done(key)
+
+    def _part_done(self, key: str, error: str = None) -> None:
+        with self._lock:
+            if error:
+                self._errors.setdefault(key, []).append(error)
+            self._parts[key] -= 1
+            if self._parts[key] > 0:
+                return
+            del self._parts[key]
+            errors = self._errors.pop(key, [])
+            pinned = self.status[key].get("pinned") or self.status[key]["status"] == UPLOADED
+        if errors:
+            self._update(key, status=FAILED, resume_from=UPLOADED if pinned else RENDERED, error="; ".join(errors))
+        else:
+            self._update(key, status=ISSUED if self.issue_each else UPLOADED)
+        self._done.release()
+
+    def _pdf_bytes(self, key: str) -> bytes:
+        pdf_bytes = self._pdfs.pop(key, None)
+        if pdf_bytes is None:
+            # Resumed run: the buffer from the render stage is gone, so read the saved PDF.
+            with open(self.status[key]["path"], "rb") as f:
+                pdf_bytes = f.read()
+        return pdf_bytes
+
+    def _stage_done(self, key: str, future, stage: str, next_state: str) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            self._pdfs.pop(key, None)
+            self._update(key, status=FAILED, resume_from=stage, error=str(e))
+            self._done.release()
+            return
+        if isinstance(result, tuple):
+            result, self._pdfs[key] = result
+        self._update(key, status=next_state, **result)
+        try:
+            self._advance(key)
+        except RuntimeError:
+            # Executors are shutting down (interrupted run); the row resumes next time.
+            self._done.release()
+
+
+def summarize(status: dict) -> dict:
+    counts = {}
+    for entry in status.values():
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Issue certificates for a whole roster (CSV or JSON).")
+    parser.add_argument("roster", help="CSV/JSON file with uid, name, course, org columns")
+    parser.add_argument("--status", help="Status file used for resuming (default: <roster>.status.json)")
+    parser.add_argument("--render-workers", type=int, default=None)
+    parser.add_argument("--upload-workers", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Unconfirmed transactions allowed at once")
+    parser.add_argument("--no-issue", action="store_true", help="Render and upload only")
+    parser.add_argument("--merkle", action="store_true",
+                        help="Anchor the whole roster under one Merkle root instead of one transaction per row")
+    parser.add_argument("--proofs", help="Proof store for --merkle (default: PROOF_DB or proofs.db)")
+    parser.add_argument("--account", type=int, default=-1,
+                        help="Node account index to send from (default: the last one, so the app on account 0 "
+                             "and job workers from account 1 keep their own nonces)")
+    parser.add_argument("--discard-pdfs", action="store_true",
+                        help="Do not keep rendered PDFs in certificates/; a resumed run re-renders them")
+    args = parser.parse_args()
+
+    load_dotenv()
+    w3, contract = (None, None) if args.no_issue else load_contract()
+
+    issuer = BatchIssuer(
+        args.status or f"{args.roster}.status.json",
+        render_workers=args.render_workers,
+        upload_workers=args.upload_workers,
+        max_in_flight=args.max_in_flight,
+        contract=contract,
+        sender=w3.eth.accounts[args.account] if w3 else None,
+        out_dir=None if args.discard_pdfs else CERT_DIR,
+        merkle=args.merkle,
+        proof_path=args.proofs,
+        on_update=lambda key, entry: print(f"{key}: {entry['status']}"),
+    )
+    status = issuer.run(load_roster(args.roster))
+    print(f"✅ Batch finished: {summarize(status)}")
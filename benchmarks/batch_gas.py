@@ -0,0 +1,92 @@
+"""Compares per-item and batched issue/verify against the deployed registry on Ganache.
+
+Run from the project root once the contract is migrated:
+
+    python -m benchmarks.batch_gas --count 200 --chunk 50
+
+Set CERTIFICATE_STORAGE=compact to measure the bytes32-keyed layout instead.
+"""
+import os
+import json
+import time
+import argparse
+from dotenv import load_dotenv
+from cid import digest_to_cid
+from blockchain import (
+    load_contract, issue_certificate, issue_certificates, storage_mode, verify_certificate, verify_certificates,
+)
+
+
+def sample_rows(count: int) -> list:
+    return [
+        {
+            "cert_id": os.urandom(32).hex(),
+            "cid": digest_to_cid(os.urandom(32)),
+            "uid": f"BENCH-{i:06d}",
+            "name": f"Candidate {i}",
+            "course": "Benchmarking 101",
+            "org": "Cairo University",
+        }
+        for i in range(count)
+    ]
+
+
+def bench_issue_single(w3, contract, sender: str, rows: list) -> dict:
+    start = time.perf_counter()
+    gas = 0
+    for row in rows:
+        tx_hash = issue_certificate(
+            contract, sender, row["cert_id"], row["cid"], row["uid"], row["name"], row["course"], row["org"]
+        )
+        gas += w3.eth.wait_for_transaction_receipt(tx_hash)["gasUsed"]
+    elapsed = time.perf_counter() - start
+    return {"transactions": len(rows), "gas_per_cert": gas / len(rows),
+            "seconds": elapsed, "certs_per_second": len(rows) / elapsed}
+
+
+def bench_issue_batch(w3, contract, sender: str, rows: list, chunk_size: int) -> dict:
+    start = time.perf_counter()
+    tx_hashes = issue_certificates(contract, sender, rows, chunk_size=chunk_size)
+    gas = sum(w3.eth.wait_for_transaction_receipt(tx_hash)["gasUsed"] for tx_hash in tx_hashes)
+    elapsed = time.perf_counter() - start
+    return {"transactions": len(tx_hashes), "gas_per_cert": gas / len(rows),
+            "seconds": elapsed, "certs_per_second": len(rows) / elapsed}
+
+
+def bench_verify(contract, cert_ids: list, chunk_size: int) -> dict:
+    start = time.perf_counter()
+    for cert_id in cert_ids:
+        verify_certificate(contract, cert_id)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    verify_certificates(contract, cert_ids, chunk_size=chunk_size)
+    batch = time.perf_counter() - start
+    return {
+        "single": {"calls": len(cert_ids), "seconds": single, "ids_per_second": len(cert_ids) / single},
+        "batch": {"calls": -(-len(cert_ids) // chunk_size), "seconds": batch,
+                  "ids_per_second": len(cert_ids) / batch},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100, help="Certificates per mode")
+    parser.add_argument("--chunk", type=int, default=50, help="Certificates per batch transaction/call")
+    args = parser.parse_args()
+
+    load_dotenv()
+    w3, contract = load_contract()
+    sender = w3.eth.accounts[0]
+
+    single_rows = sample_rows(args.count)
+    batch_rows = sample_rows(args.count)
+    results = {
+        "storage": storage_mode(),
+        "count": args.count,
+        "chunk": args.chunk,
+        "issue_single": bench_issue_single(w3, contract, sender, single_rows),
+        "issue_batch": bench_issue_batch(w3, contract, sender, batch_rows, args.chunk),
+        "verify": bench_verify(contract, [row["cert_id"] for row in batch_rows], args.chunk),
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,60 @@
+"""Issued-ID Bloom filter: false positive rate, memory and lookup latency.
+
+Fills the filter with random 32-byte certificate IDs and probes it with IDs
+that were never added, so no node is needed:
+
+    python -m benchmarks.bloom --ids 100000 1000000 --error-rates 0.01 0.001
+"""
+import os
+import json
+import time
+import argparse
+from bloom import BloomFilter
+from benchmarks.stats import percentiles
+
+
+def random_ids(count: int) -> list:
+    return [os.urandom(32).hex() for _ in range(count)]
+
+
+def bench(count: int, error_rate: float, probes: int) -> dict:
+    issued = random_ids(count)
+    bloom = BloomFilter(count, error_rate)
+
+    start = time.perf_counter()
+    for cert_id in issued:
+        bloom.add(cert_id)
+    insert_seconds = time.perf_counter() - start
+
+    # Every issued ID must test positive; a miss here would wrongly reject a real certificate.
+    assert all(cert_id in bloom for cert_id in issued[:probes])
+
+    unknown = random_ids(probes)
+    latencies = []
+    false_positives = 0
+    for cert_id in unknown:
+        begin = time.perf_counter()
+        false_positives += cert_id in bloom
+        latencies.append(time.perf_counter() - begin)
+
+    return {
+        "ids": count,
+        "target_error_rate": error_rate,
+        "measured_false_positive_rate": round(false_positives / probes, 5),
+        "hashes": bloom.hashes,
+        "bytes": len(bloom.bits),
+        "bytes_per_million_ids": round(len(bloom.bits) / count * 1_000_000),
+        "bits_per_id": round(bloom.size / count, 2),
+        "inserts_per_second": round(count / insert_seconds),
+        "lookup": percentiles(latencies, "us"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ids", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--error-rates", type=float, nargs="+", default=[0.01, 0.001])
+    parser.add_argument("--probes", type=int, default=200_000, help="Never-issued IDs looked up per run")
+    args = parser.parse_args()
+
+    print(json.dumps([bench(count, rate, args.probes) for count in args.ids for rate in args.error_rates], indent=2))
@@ -0,0 +1,141 @@
+"""End-to-end issue throughput, verify latency and memory against a throwaway Ganache chain.
+
+Starts Ganache on its own port and database directory (launch.py's helpers),
+deploys CertificateRegistry from the Truffle artifact, swaps Pinata for the
+local stub and runs the real batch pipeline (render -> pin + issue) for each
+roster size. Needs the ``ganache`` CLI on PATH and a compiled artifact:
+
+    python -m benchmarks.e2e --sizes 1,100,10000 --output bench_e2e.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import launch
+from batch import BatchIssuer, ISSUED, summarize
+from blockchain import (get_web3, deploy_contract, load_contract_abi, storage_mode,
+                        verify_certificate, verify_certificates)
+from ipfs import UploadQueue, PinIndex
+from storage import PinataStorage, FilesystemStorage
+from benchmarks.pinata_stub import PinataStub
+from benchmarks.stats import percentiles
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_PORT = 8555
+VERIFY_SAMPLES = 200
+
+
+def peak_rss_mb() -> dict:
+    """Peak resident memory of this process and of its (render pool) children so far."""
+    if resource is None:
+        return {}
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def bench_size(size: int, contract, storage, work_dir: str, args) -> dict:
+    roster = [{"uid": f"bench-{size}-{i:06d}", "name": f"Candidate {i}", "course": "Benchmarking",
+               "org": "Cairo University"} for i in range(size)]
+    run_dir = os.path.join(work_dir, str(size))
+    os.makedirs(run_dir)
+    uploader = UploadQueue(args.upload_workers, upload=storage.add,
+                           index=PinIndex(os.path.join(run_dir, "pins.db"), backend=storage.name))
+    issuer = BatchIssuer(os.path.join(run_dir, "status.json"), render_workers=args.render_workers,
+                         max_in_flight=args.max_in_flight, contract=contract, uploader=uploader,
+                         out_dir=os.path.join(run_dir, "certificates") if args.keep else None)
+
+    start = time.perf_counter()
+    status = issuer.run(roster)
+    issue_seconds = time.perf_counter() - start
+    issuer.tx_manager.stop()
+    uploader.shutdown()
+
+    cert_ids = [entry["cert_id"] for entry in status.values() if entry["status"] == ISSUED]
+    sample = random.Random(size).sample(cert_ids, min(len(cert_ids), args.verify_samples))
+    latencies = []
+    for cert_id in sample:
+        start = time.perf_counter()
+        verify_certificate(contract, cert_id)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    found = sum(cert["exists"] for cert in verify_certificates(contract, cert_ids))
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "statuses": summarize(status),
+        "issue_seconds": round(issue_seconds, 3),
+        "issued_per_second": round(len(cert_ids) / issue_seconds, 2),
+        "verify_latency": percentiles(latencies) if latencies else None,
+        "verify_batch_per_second": round(len(cert_ids) / batch_seconds, 2) if cert_ids else None,
+        "verify_batch_found": found,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,100,10000", help="Comma-separated roster sizes")
+    parser.add_argument("--port", type=int, default=BENCH_PORT, help="Port for the throwaway Ganache")
+    parser.add_argument("--storage", choices=("stub", "filesystem"), default="stub")
+    parser.add_argument("--render-workers", type=int, default=None)
+    parser.add_argument("--upload-workers", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--verify-samples", type=int, default=VERIFY_SAMPLES)
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the work directory with the rendered PDFs")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    stub = None
+    try:
+        launch.open_ganache_process(args.port, os.path.join(work_dir, "ganache_db"))
+        launch.wait_for_ganache(port=args.port)
+        w3 = get_web3(f"http://127.0.0.1:{args.port}")
+        address = deploy_contract(w3)
+        contract = w3.eth.contract(address=address, abi=load_contract_abi())
+
+        if args.storage == "stub":
+            # 10k certificates of ~350 KB each would not fit in the stub's memory, so only CIDs are kept.
+            stub = PinataStub(keep_content=False).start()
+            os.environ.update(PINATA_API_URL=stub.url, PINATA_API_KEY="bench", PINATA_API_SECRET="bench")
+            storage = PinataStorage()
+        else:
+            storage = FilesystemStorage(os.path.join(work_dir, "ipfs_store"))
+
+        results = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "storage": storage.name,
+            "certificate_storage": storage_mode(),
+            "runs": [bench_size(int(size), contract, storage, work_dir, args) for size in args.sizes.split(",")],
+        }
+        output = json.dumps(results, indent=2)
+        print(output)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output + "\n")
+    finally:
+        if stub:
+            stub.shutdown()
+        launch.terminate_processes()
+        if args.keep:
+            print(f"📁 Work directory kept at {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
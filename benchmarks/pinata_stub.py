@@ -0,0 +1,128 @@
+"""Local stand-in for Pinata's pinFileToIPFS endpoint, for tests and benchmarks.
+
+    python -m benchmarks.pinata_stub --port 8601 --latency 0.05 --error-rate 0.1
+
+Point the app at it with PINATA_API_URL=http://127.0.0.1:8601/pinning/pinFileToIPFS
+(any non-empty PINATA_API_KEY/PINATA_API_SECRET are accepted). It also answers
+Kubo's /api/v0/add and /api/v0/cat and serves pinned files under /ipfs/<cid>,
+so STORAGE_BACKEND=kubo with IPFS_API_URL=http://127.0.0.1:8601 and
+IPFS_GATEWAY_URL=http://127.0.0.1:8601/ipfs/ works against it too.
+"""
+import time
+import json
+import random
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from cid import compute_cid
+
+PIN_PATH = "/pinning/pinFileToIPFS"
+KUBO_ADD_PATH = "/api/v0/add"
+KUBO_CAT_PATH = "/api/v0/cat"
+GATEWAY_PREFIX = "/ipfs/"
+
+
+class PinataStub(ThreadingHTTPServer):
+    """Accepts multipart uploads and answers like Pinata, with optional latency and 429/503 errors."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, error_rate: float = 0.0, keep_content: bool = True):
+        super().__init__(("127.0.0.1", port), _PinHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        # Large runs can skip holding every pinned file in memory; cat/gateway then answer 404.
+        self.keep_content = keep_content
+        self.pinned = {}
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{PIN_PATH}"
+
+    def start(self) -> "PinataStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _PinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server._lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        path = urlsplit(self.path).path
+        if path == KUBO_CAT_PATH:
+            return self._send_file(parse_qs(urlsplit(self.path).query).get("arg", [""])[0])
+        if path not in (PIN_PATH, KUBO_ADD_PATH):
+            return self._reply(404, {"error": "Not found"})
+        if path == PIN_PATH and (not self.headers.get("pinata_api_key")
+                                 or not self.headers.get("pinata_secret_api_key")):
+            return self._reply(401, {"error": "Missing API keys"})
+        if random.random() < server.error_rate:
+            with server._lock:
+                server.errors += 1
+            return self._reply(random.choice((429, 503)), {"error": "Try again later"})
+
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        parts = [part for part in message.iter_parts() if part.get_param("name", header="content-disposition") == "file"]
+        if not parts:
+            return self._reply(400, {"error": "No file"})
+        data = parts[0].get_payload(decode=True)
+        cid = compute_cid(data)
+        with server._lock:
+            server.pinned[cid] = data if server.keep_content else None
+        if path == KUBO_ADD_PATH:
+            return self._reply(200, {"Name": parts[0].get_filename(), "Hash": cid, "Size": str(len(data))})
+        self._reply(200, {"IpfsHash": cid, "PinSize": len(data), "Timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ")})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if not path.startswith(GATEWAY_PREFIX):
+            return self._reply(404, {"error": "Not found"})
+        self._send_file(path[len(GATEWAY_PREFIX):])
+
+    def _send_file(self, cid: str) -> None:
+        data = self.server.pinned.get(cid)
+        if data is None:
+            return self._reply(404, {"error": f"{cid} not found"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 429/503")
+    args = parser.parse_args()
+
+    stub = PinataStub(args.port, args.latency, args.error_rate)
+    print(f"🚀 Pinata stub listening on {stub.url}")
+    stub.serve_forever()
@@ -0,0 +1,60 @@
+"""Certificates/second for uncached per-call rendering versus the cached and pooled engine.
+
+    python -m benchmarks.render --count 200 --workers 4
+"""
+import os
+import json
+import time
+import tempfile
+import argparse
+import ipfs
+from ipfs import generate_certificate, render_certificate, render_certificates, warm_renderer
+
+LOGO_PATH = "images/Cairo_University.png"
+
+
+def sample_rows(count: int) -> list:
+    return [(f"UID-{i:06d}", f"Candidate {i}", "Computer Science") for i in range(count)]
+
+
+def bench_uncached(rows: list) -> float:
+    """Cold caches and a file on disk per certificate, as generate_certificate used to run."""
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        for i, (uid, name, course) in enumerate(rows):
+            ipfs._certificate_styles.cache_clear()
+            ipfs._logo_flowable.cache_clear()
+            generate_certificate(os.path.join(out_dir, f"{i}.pdf"), uid, name, course, LOGO_PATH)
+        return time.perf_counter() - start
+
+
+def bench_in_memory(rows: list) -> float:
+    warm_renderer(LOGO_PATH)
+    start = time.perf_counter()
+    for uid, name, course in rows:
+        render_certificate(uid, name, course, LOGO_PATH)
+    return time.perf_counter() - start
+
+
+def bench_pool(rows: list, workers: int) -> float:
+    start = time.perf_counter()
+    render_certificates(rows, LOGO_PATH, workers=workers)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    rows = sample_rows(args.count)
+    timings = {
+        "uncached": bench_uncached(rows),
+        "in_memory": bench_in_memory(rows),
+        f"pool_{args.workers}": bench_pool(rows, args.workers),
+    }
+    print(json.dumps({
+        "count": args.count,
+        "certs_per_second": {mode: round(args.count / seconds, 2) for mode, seconds in timings.items()},
+    }, indent=2))
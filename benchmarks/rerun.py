@@ -0,0 +1,62 @@
+"""Per-rerun cost of app.py's setup work, re-done on every rerun versus cached.
+
+Covers what the Streamlit script used to redo on each interaction: parsing the
+Truffle artifact, building the contract object and base64-encoding the home
+page images. Needs no running node.
+
+    python -m benchmarks.rerun --reruns 200
+"""
+import json
+import time
+import base64
+import argparse
+import blockchain
+from web3 import Web3
+from blockchain import CONTRACT_JSON, load_contract_abi
+
+IMAGES = ("images/admin.png", "images/verifier.png")
+ADDRESS = "0x" + "11" * 20
+
+
+def setup_uncached() -> None:
+    with open(CONTRACT_JSON) as f:
+        abi = json.load(f)["abi"]
+    Web3().eth.contract(address=Web3.to_checksum_address(ADDRESS), abi=abi)
+    for path in IMAGES:
+        with open(path, "rb") as f:
+            base64.b64encode(f.read()).decode()
+
+
+def bench(setup, reruns: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reruns):
+        setup()
+    return (time.perf_counter() - start) / reruns * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=100)
+    args = parser.parse_args()
+
+    cache = {}
+
+    def setup_cached() -> None:
+        # Same lookups app.py now does: mtime-keyed ABI plus memoised contract and images.
+        abi = load_contract_abi()
+        key = (ADDRESS, id(abi))
+        if key not in cache:
+            cache[key] = Web3().eth.contract(address=Web3.to_checksum_address(ADDRESS), abi=abi)
+        for path in IMAGES:
+            if path not in cache:
+                with open(path, "rb") as f:
+                    cache[path] = base64.b64encode(f.read()).decode()
+
+    blockchain._abi_cache.clear()
+    print(json.dumps({
+        "reruns": args.reruns,
+        "ms_per_rerun": {
+            "uncached": round(bench(setup_uncached, args.reruns), 3),
+            "cached": round(bench(setup_cached, args.reruns), 3),
+        },
+    }, indent=2))
@@ -0,0 +1,16 @@
+"""Latency summaries shared by the benchmarks."""
+
+# Unit -> (seconds multiplier, decimals kept).
+UNITS = {"us": (1e6, 2), "ms": (1000, 3)}
+
+
+def percentiles(values: list, unit: str = "ms") -> dict:
+    """p50/p90/p99/max of latencies given in seconds, keyed like ``p50_ms``."""
+    scale, digits = UNITS[unit]
+    ordered = sorted(values)
+
+    def pick(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * scale, digits)
+
+    return {f"p50_{unit}": pick(50), f"p90_{unit}": pick(90), f"p99_{unit}": pick(99),
+            f"max_{unit}": round(ordered[-1] * scale, digits)}
@@ -0,0 +1,65 @@
+"""Uploads/second for one-off requests.post calls versus the pooled, concurrent UploadQueue.
+
+Runs against the local Pinata stub, so no credentials or network are needed:
+
+    python -m benchmarks.upload --count 200 --size 65536 --workers 8 --latency 0.05 --error-rate 0.05
+"""
+import os
+import json
+import time
+import argparse
+import requests
+from ipfs import UploadQueue
+from benchmarks.pinata_stub import PinataStub
+
+
+def sample_files(count: int, size: int) -> list:
+    return [(os.urandom(size), f"bench-{i:06d}.pdf") for i in range(count)]
+
+
+def bench_unpooled(files: list, url: str) -> tuple:
+    """A new connection per file and no retries, as upload_to_pinata used to run."""
+    headers = {"pinata_api_key": "bench", "pinata_secret_api_key": "bench"}
+    start = time.perf_counter()
+    failed = 0
+    for data, name in files:
+        if requests.post(url, files={"file": (name, data)}, headers=headers).status_code != 200:
+            failed += 1
+    return time.perf_counter() - start, failed
+
+
+def bench_queue(files: list, workers: int) -> tuple:
+    queue = UploadQueue(workers)
+    start = time.perf_counter()
+    queue.upload_many(files)
+    elapsed = time.perf_counter() - start
+    queue.shutdown()
+    return elapsed, queue.stats()["failed"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--size", type=int, default=64 * 1024, help="Bytes per file")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of 429/503 answers")
+    args = parser.parse_args()
+
+    stub = PinataStub(latency=args.latency, error_rate=args.error_rate).start()
+    os.environ.update(PINATA_API_URL=stub.url, PINATA_API_KEY="bench", PINATA_API_SECRET="bench")
+
+    files = sample_files(args.count, args.size)
+    results = {
+        "unpooled": bench_unpooled(files, stub.url),
+        f"queue_{args.workers}": bench_queue(files, args.workers),
+    }
+    print(json.dumps({
+        "count": args.count,
+        "size": args.size,
+        "uploads_per_second": {mode: round(args.count / seconds, 2) for mode, (seconds, _) in results.items()},
+        "failed": {mode: failed for mode, (_, failed) in results.items()},
+        "stub_requests": stub.requests,
+        "stub_errors": stub.errors,
+    }, indent=2))
+    stub.shutdown()
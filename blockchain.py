@@ -0,0 +1,553 @@
+import os
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from eth_abi import encode
+from web3 import Web3
+from web3.providers import JSONBaseProvider
+from cid import cid_to_digest, digest_to_cid
+from merkle import MerkleTree, ProofStore, open_proof_store, hash_leaf, compute_root
+from metrics import timed, inc
+
+CONTRACT_JSON = "build/contracts/CertificateRegistry.json"
+CONTRACT_SOURCE = "contracts/CertificateRegistry.sol"
+RPC_URL = "http://127.0.0.1:8545"
+RPC_CONNECT_TIMEOUT = 3
+RPC_READ_TIMEOUT = 15
+RPC_POOL_SIZE = 16
+RPC_BATCH_SIZE = 20
+
+# "string" keeps the original string-keyed records; "compact" issues bytes32-keyed
+# packed records. Verification always falls back to the other layout.
+STRING_STORAGE = "string"
+COMPACT_STORAGE = "compact"
+# Certificates anchored under a Merkle root; only ever a verification/revocation layout.
+MERKLE_STORAGE = "merkle"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+ISSUE_EVENTS = ("CertificateIssued", "CompactCertificateIssued")
+REVOKE_EVENTS = ("CertificateRevoked", "CompactCertificateRevoked", "AnchoredCertificateRevoked")
+ANCHOR_EVENTS = ("RootAnchored",)
+
+
+_abi_cache = {}
+
+
+def load_contract_abi(json_path: str = CONTRACT_JSON) -> list:
+    """Reads the contract ABI from the Truffle build artifact.
+
+    The artifact is ~700 KB of JSON, so the parsed ABI is kept until the
+    file's mtime changes (e.g. after ``truffle compile``).
+    """
+    mtime = os.path.getmtime(json_path)
+    cached = _abi_cache.get(json_path)
+    if cached is None or cached[0] != mtime:
+        with open(json_path) as f:
+            contract_data = json.load(f)
+        _warn_if_stale(json_path, contract_data)
+        cached = _abi_cache[json_path] = (mtime, contract_data["abi"])
+    return cached[1]
+
+
+def _warn_if_stale(json_path: str, contract_data: dict, source_path: str = CONTRACT_SOURCE) -> None:
+    """Flags an artifact compiled from an older contract source, whose ABI lacks the newer functions."""
+    if not os.path.exists(source_path):
+        return
+    with open(source_path, encoding="utf-8", newline="") as f:
+        if f.read() == contract_data.get("source"):
+            return
+    print(f"⚠️ {json_path} was compiled from an older {source_path}; run `truffle compile` "
+          f"(python launch.py does it for you) to use the newer contract functions.")
+
+
+class _PooledHTTPProvider(JSONBaseProvider):
+    """JSON-RPC over HTTP through one shared, pooled requests.Session; counts and times every method.
+
+    web3's HTTPProvider keeps one session per thread, so each Streamlit script
+    thread would open (and keep) its own connection. This provider posts
+    through the session it is given, using only web3's public provider API.
+    """
+
+    def __init__(self, endpoint_uri: str, session: requests.Session, timeout: tuple):
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self.session = session
+        self.timeout = timeout
+
+    def _post(self, data: bytes):
+        response = self.session.post(
+            self.endpoint_uri, data=data, headers={"Content-Type": "application/json"}, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+    def make_request(self, method, params):
+        inc("rpc_calls", method=method)
+        with timed("rpc_request", method=method):
+            return self._post(self.encode_rpc_request(method, params))
+
+    def make_batch_request(self, batch_requests):
+        for method, _ in batch_requests:
+            inc("rpc_calls", method=method)
+        with timed("rpc_batch_request"):
+            responses = self._post(self.encode_batch_rpc_request(batch_requests))
+        if not isinstance(responses, list):
+            # A failed batch comes back as a single error object.
+            return responses
+        # Request IDs increase through the batch, so sorting by ID restores request order.
+        return sorted(responses, key=lambda response: response["id"])
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _rpc_settings(rpc_url: str = None) -> tuple:
+    url = rpc_url or os.getenv("RPC_URL", RPC_URL)
+    read_timeout = float(os.getenv("RPC_TIMEOUT", RPC_READ_TIMEOUT))
+    return url, read_timeout
+
+
+def get_web3(rpc_url: str = None) -> Web3:
+    """Process-wide Web3 client; all threads multiplex over one keep-alive connection pool."""
+    url, read_timeout = _rpc_settings(rpc_url)
+    with _clients_lock:
+        if url not in _clients:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RPC_POOL_SIZE, pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _clients[url] = Web3(_PooledHTTPProvider(url, session, (RPC_CONNECT_TIMEOUT, read_timeout)))
+        return _clients[url]
+
+
+def _contract_address() -> str:
+    contract_address = os.getenv("CONTRACT_ADDRESS")
+    if not contract_address:
+        raise EnvironmentError("Missing CONTRACT_ADDRESS in .env")
+    return Web3.to_checksum_address(contract_address)
+
+
+def load_contract(json_path: str = CONTRACT_JSON, rpc_url: str = None):
+    """Returns a (w3, contract) pair for the deployed CertificateRegistry."""
+    address = _contract_address()
+    w3 = get_web3(rpc_url)
+    return w3, w3.eth.contract(address=address, abi=load_contract_abi(json_path))
+
+
+def deploy_contract(w3, owner: str = None, json_path: str = CONTRACT_JSON) -> str:
+    """Deploys CertificateRegistry from the artifact's bytecode and returns its address.
+
+    Mirrors the Truffle migration: ``owner`` (default: the node's first
+    account) becomes the owner and first issuer.
+    """
+    with open(json_path) as f:
+        bytecode = json.load(f)["bytecode"]
+    owner = owner or w3.eth.accounts[0]
+    factory = w3.eth.contract(abi=load_contract_abi(json_path), bytecode=bytecode)
+    tx_hash = factory.constructor(owner).transact({"from": owner})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    if receipt["status"] != 1 or not receipt["contractAddress"]:
+        raise RuntimeError(f"Deployment transaction {tx_hash.to_0x_hex()} failed")
+    return receipt["contractAddress"]
+
+
+def storage_mode() -> str:
+    mode = os.getenv("CERTIFICATE_STORAGE", STRING_STORAGE).lower()
+    if mode not in (STRING_STORAGE, COMPACT_STORAGE):
+        raise EnvironmentError(f"Unknown CERTIFICATE_STORAGE: {mode}")
+    return mode
+
+
+def cert_id_to_bytes32(cert_id: str) -> bytes:
+    """Converts a 64-char hex certificate ID into the raw bytes32 key."""
+    raw = bytes.fromhex(cert_id.removeprefix("0x"))
+    if len(raw) != 32:
+        raise ValueError(f"Certificate ID must be 32 bytes: {cert_id}")
+    return raw
+
+
+def details_hash(uid: str, name: str, course: str, org: str) -> bytes:
+    """Matches keccak256(abi.encode(uid, name, course, org)) in the contract."""
+    return Web3.keccak(encode(["string", "string", "string", "string"], [uid, name, course, org]))
+
+
+def issue_call(contract, cert_id: str, cid: str, uid: str, name: str, course: str, org: str):
+    """Builds the issuance ContractFunction for the configured storage layout without sending it."""
+    if storage_mode() == COMPACT_STORAGE:
+        _require_function(contract, "issueCompactCertificate")
+        return contract.functions.issueCompactCertificate(
+            cert_id_to_bytes32(cert_id), cid_to_digest(cid), uid, name, course, org
+        )
+    return contract.functions.issueCertificate(cert_id, cid, uid, name, course, org)
+
+
+def issue_certificate(contract, sender: str, cert_id: str, cid: str, uid: str,
+                      name: str, course: str, org: str) -> str:
+    """Issues one certificate in the configured storage layout and returns the 0x-prefixed tx hash."""
+    call = issue_call(contract, cert_id, cid, uid, name, course, org)
+    with timed("tx_transact"):
+        return call.transact({"from": sender}).to_0x_hex()
+
+
+def merkle_leaf(cert_id: str, cid: str, uid: str, name: str, course: str, org: str) -> bytes:
+    """Leaf committing to the certificate ID, its CID and its personal fields."""
+    return hash_leaf(cert_id_to_bytes32(cert_id) + cid_to_digest(cid) + details_hash(uid, name, course, org))
+
+
+def merkle_batch(rows: list) -> MerkleTree:
+    """Tree over rows of {cert_id, cid, uid, name, course, org}, leaves in row order."""
+    return MerkleTree([
+        merkle_leaf(row["cert_id"], row["cid"], row["uid"], row["name"], row["course"], row["org"]) for row in rows
+    ])
+
+
+def anchor_call(contract, tree: MerkleTree):
+    """Builds the anchorRoot ContractFunction for a batch tree without sending it."""
+    _require_function(contract, "anchorRoot")
+    return contract.functions.anchorRoot(tree.root, len(tree))
+
+
+def revoke_calls(contract, certs: list, chunk_size: int = 100) -> list:
+    """Builds the ContractFunctions revoking verified ``certs``, one per layout (and root) chunk.
+
+    ``certs`` are results of verify_certificates, whose ``layout`` says where
+    each record lives. Deployments without the bulk functions get one call
+    per certificate.
+    """
+    string_ids, compact_ids, anchored = [], [], {}
+    for cert in certs:
+        layout = cert.get("layout", STRING_STORAGE)
+        if layout == MERKLE_STORAGE:
+            anchored.setdefault(cert["root"], []).append(cert_id_to_bytes32(cert["cert_id"]))
+        elif layout == COMPACT_STORAGE:
+            compact_ids.append(cert_id_to_bytes32(cert["cert_id"]))
+        else:
+            string_ids.append(cert["cert_id"])
+
+    calls = []
+    if _has_function(contract, "revokeCertificates"):
+        calls.extend(contract.functions.revokeCertificates(chunk) for chunk in chunked(string_ids, chunk_size))
+    else:
+        calls.extend(contract.functions.revokeCertificate(cert_id) for cert_id in string_ids)
+    if _has_function(contract, "revokeCompactCertificates"):
+        calls.extend(contract.functions.revokeCompactCertificates(chunk) for chunk in chunked(compact_ids, chunk_size))
+    else:
+        calls.extend(contract.functions.revokeCompactCertificate(key) for key in compact_ids)
+    if anchored:
+        _require_function(contract, "revokeAnchoredCertificates")
+    for root, keys in anchored.items():
+        calls.extend(
+            contract.functions.revokeAnchoredCertificates(bytes.fromhex(root), chunk)
+            for chunk in chunked(keys, chunk_size)
+        )
+    return calls
+
+
+def decode_certificate(cert_id: str, raw) -> dict:
+    """Maps a verifyCertificate result tuple to a dict."""
+    exists, uid, name, course, org, cid, issuer, revoked, issued_at = raw
+    return {
+        "cert_id": cert_id,
+        "exists": exists,
+        "uid": uid,
+        "name": name,
+        "course": course,
+        "org": org,
+        "cid": cid,
+        "issuer": issuer,
+        "revoked": revoked,
+        "issued_at": issued_at,
+    }
+
+
+def missing_certificate(cert_id: str) -> dict:
+    """The record verification returns for an ID that was never issued."""
+    return decode_certificate(cert_id, (False, "", "", "", "", "", ZERO_ADDRESS, False, 0))
+
+
+def decode_stored_certificate(cert_id: str, raw) -> dict:
+    """Maps a stored Certificate struct (as returned by verifyCertificates) to a dict."""
+    cid, issuer, revoked, issued_at, uid, name, course, org = raw
+    return decode_certificate(cert_id, (bool(cid), uid, name, course, org, cid, issuer, revoked, issued_at))
+
+
+def decode_compact_certificate(cert_id: str, raw, details: dict = None) -> dict:
+    """Maps a CompactCertificate struct plus its issue-event fields to a dict."""
+    issuer, revoked, issued_at, cid_digest, stored_details_hash = raw
+    exists = issuer != ZERO_ADDRESS
+    details = details or {}
+    if details and details_hash(
+        details["uid"], details["candidateName"], details["courseName"], details["organization"]
+    ) != stored_details_hash:
+        details = {}
+    return decode_certificate(cert_id, (
+        exists,
+        details.get("uid", ""),
+        details.get("candidateName", ""),
+        details.get("courseName", ""),
+        details.get("organization", ""),
+        digest_to_cid(cid_digest) if exists else "",
+        issuer,
+        revoked,
+        issued_at,
+    ))
+
+
+_deployment_blocks = {}
+
+
+def deployment_block(contract) -> int:
+    """First block with code at the contract's address; no registry event can be older.
+
+    Found by bisecting eth_getCode once per address. Nodes that cannot serve
+    historical state get 0, i.e. a scan from genesis.
+    """
+    if contract.address not in _deployment_blocks:
+        low = 0
+        try:
+            high = contract.w3.eth.block_number
+            while low < high:
+                middle = (low + high) // 2
+                if contract.w3.eth.get_code(contract.address, middle):
+                    high = middle
+                else:
+                    low = middle + 1
+        except Exception:
+            low = 0
+        _deployment_blocks[contract.address] = low
+    return _deployment_blocks[contract.address]
+
+
+def compact_details(contract, keys: list, chunk_size: int = 200) -> dict:
+    """Fetches the personal fields of compact certificates from their issue events."""
+    details = {}
+    from_block = deployment_block(contract) if keys else 0
+    for chunk in chunked(keys, chunk_size):
+        logs = contract.events.CompactCertificateIssued().get_logs(
+            from_block=from_block, argument_filters={"certificateId": chunk}
+        )
+        details.update((log["args"]["certificateId"], log["args"]) for log in logs)
+    return details
+
+
+def call_many(w3, calls: list) -> list:
+    """Runs contract view calls, packing several into each JSON-RPC batch request."""
+    if len(calls) == 1:
+        return [calls[0].call()]
+    results = []
+    for group in chunked(calls, RPC_BATCH_SIZE):
+        with w3.batch_requests() as batch:
+            for call in group:
+                batch.add(call)
+            results.extend(batch.execute())
+    return results
+
+
+def verify_compact_certificates(contract, cert_ids: list, chunk_size: int = 200) -> list:
+    keys = [cert_id_to_bytes32(cert_id) for cert_id in cert_ids]
+    stored = []
+    for result in call_many(contract.w3, [
+        contract.functions.verifyCompactCertificates(chunk) for chunk in chunked(keys, chunk_size)
+    ]):
+        stored.extend(result)
+    found = [key for key, raw in zip(keys, stored) if raw[0] != ZERO_ADDRESS]
+    details = compact_details(contract, found, chunk_size)
+    return [
+        {**decode_compact_certificate(cert_id, raw, details.get(key)), "layout": COMPACT_STORAGE}
+        for cert_id, key, raw in zip(cert_ids, keys, stored)
+    ]
+
+
+def verify_merkle_certificates(contract, cert_ids: list, store: ProofStore = None, chunk_size: int = 200) -> list:
+    """Checks stored inclusion proofs against anchored roots.
+
+    Each proof is folded up to its root locally, and all distinct roots are
+    looked up together, so a whole batch costs one verifyRoots call. Details
+    come from the proof store but are part of the leaf, so edited records
+    simply fail to reach an anchored root.
+    """
+    store = store or open_proof_store()
+    records = store.get_many(list(cert_ids)) if store else {}
+    roots = {}
+    for cert_id, record in records.items():
+        leaf = merkle_leaf(cert_id, record["cid"], record["uid"], record["name"], record["course"], record["org"])
+        roots[cert_id] = compute_root(leaf, record["proof"])
+
+    chunks = list(chunked(list(dict.fromkeys(roots.values())), chunk_size))
+    calls = [contract.functions.verifyRoots(c) for c in chunks]
+    # Revocation flags ride in the same JSON-RPC batch as the root lookups.
+    pairs = list(chunked(list(roots.items()), chunk_size))
+    if pairs and _has_function(contract, "verifyAnchoredRevocations"):
+        calls += [
+            contract.functions.verifyAnchoredRevocations([root for _, root in pair],
+                                                         [cert_id_to_bytes32(cert_id) for cert_id, _ in pair])
+            for pair in pairs
+        ]
+    results = call_many(contract.w3, calls) if calls else []
+    anchors = {}
+    for chunk, result in zip(chunks, results):
+        anchors.update(zip(chunk, result))
+    revoked = set()
+    for pair, flags in zip(pairs, results[len(chunks):]):
+        revoked.update(cert_id for (cert_id, _), flag in zip(pair, flags) if flag)
+
+    certs = []
+    for cert_id in cert_ids:
+        record = records.get(cert_id)
+        issuer, anchored_at, _ = anchors.get(roots.get(cert_id), (ZERO_ADDRESS, 0, 0))
+        if record is None or issuer == ZERO_ADDRESS:
+            certs.append(missing_certificate(cert_id))
+            continue
+        cert = decode_certificate(cert_id, (True, record["uid"], record["name"], record["course"], record["org"],
+                                            record["cid"], issuer, cert_id in revoked, anchored_at))
+        cert["layout"] = MERKLE_STORAGE
+        cert["root"] = roots[cert_id].hex()
+        certs.append(cert)
+    return certs
+
+
+def _has_function(contract, name: str, kind: str = "function") -> bool:
+    return any(item.get("type") == kind and item.get("name") == name for item in contract.abi)
+
+
+def _require_function(contract, name: str) -> None:
+    """Fails with a pointer to the fix when the loaded ABI predates ``name``."""
+    if not _has_function(contract, name):
+        raise RuntimeError(
+            f"The contract ABI has no {name}; recompile with `truffle compile` (or run python launch.py) "
+            f"and redeploy to use it."
+        )
+
+
+def _verify_string_certificates(contract, cert_ids: list, chunk_size: int = 200) -> list:
+    if len(cert_ids) == 1 or not _has_function(contract, "verifyCertificates"):
+        # Deployments (and artifacts) from before verifyCertificates: one view call per ID, still batched.
+        results = call_many(contract.w3, [contract.functions.verifyCertificate(cert_id) for cert_id in cert_ids])
+        certs = [decode_certificate(cert_id, raw) for cert_id, raw in zip(cert_ids, results)]
+    else:
+        stored = []
+        for result in call_many(contract.w3, [
+            contract.functions.verifyCertificates(chunk) for chunk in chunked(cert_ids, chunk_size)
+        ]):
+            stored.extend(result)
+        certs = [decode_stored_certificate(cert_id, raw) for cert_id, raw in zip(cert_ids, stored)]
+    return [{**cert, "layout": STRING_STORAGE} for cert in certs]
+
+
+def _verify_many(contract, cert_ids: list, chunk_size: int = 200) -> list:
+    """Looks IDs up in the configured layout first, then the other one for misses."""
+    # Older deployments only have the string-keyed layout.
+    if not _has_function(contract, "verifyCompactCertificates"):
+        return _verify_string_certificates(contract, cert_ids, chunk_size)
+
+    compact_ids = set()
+    for cert_id in cert_ids:
+        try:
+            cert_id_to_bytes32(cert_id)
+            compact_ids.add(cert_id)
+        except ValueError:
+            pass
+
+    lookups = [_verify_string_certificates, verify_compact_certificates]
+    if storage_mode() == COMPACT_STORAGE:
+        lookups.reverse()
+
+    results = {}
+    remaining = list(dict.fromkeys(cert_ids))
+    for lookup in lookups:
+        if lookup is verify_compact_certificates:
+            candidates = [cert_id for cert_id in remaining if cert_id in compact_ids]
+        else:
+            candidates = remaining
+        if not candidates:
+            continue
+        for cert in lookup(contract, candidates, chunk_size):
+            if cert["exists"] or cert["cert_id"] not in results:
+                results[cert["cert_id"]] = cert
+        # Only IDs that were looked up have a result; e.g. non-hex IDs skip the compact pass.
+        remaining = [cert_id for cert_id in remaining if not results.get(cert_id, {}).get("exists")]
+
+    merkle_ids = [cert_id for cert_id in remaining if cert_id in compact_ids]
+    if merkle_ids and _has_function(contract, "verifyRoots"):
+        for cert in verify_merkle_certificates(contract, merkle_ids, chunk_size=chunk_size):
+            if cert["exists"]:
+                results[cert["cert_id"]] = cert
+    return [results[cert_id] for cert_id in cert_ids]
+
+
+def verify_certificate(contract, cert_id: str) -> dict:
+    return verify_certificates(contract, [cert_id])[0]
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def verify_certificates(contract, cert_ids: list, chunk_size: int = 200) -> list:
+    """Verifies many IDs in a handful of round trips.
+
+    IDs are grouped ``chunk_size`` per verifyCertificates call and up to
+    RPC_BATCH_SIZE calls travel in one JSON-RPC batch request, so 1,000 IDs
+    take a single HTTP request per storage layout consulted.
+    """
+    cert_ids = list(cert_ids)
+    inc("certificates_verified", len(cert_ids))
+    with timed("verify_certificates"):
+        return _verify_many(contract, cert_ids, chunk_size)
+
+
+def issue_certificates(contract, sender: str, rows: list, chunk_size: int = 50) -> list:
+    """Issues rows of {cert_id, cid, uid, name, course, org} with one transaction per chunk.
+
+    Returns the transaction hashes in chunk order.
+    """
+    compact = storage_mode() == COMPACT_STORAGE
+    tx_hashes = []
+    for chunk in chunked(list(rows), chunk_size):
+        if compact:
+            inputs = [
+                (cert_id_to_bytes32(row["cert_id"]), cid_to_digest(row["cid"]),
+                 row["uid"], row["name"], row["course"], row["org"])
+                for row in chunk
+            ]
+            _require_function(contract, "issueCompactCertificates")
+            call = contract.functions.issueCompactCertificates(inputs)
+        else:
+            inputs = [
+                (row["cert_id"], row["cid"], row["uid"], row["name"], row["course"], row["org"])
+                for row in chunk
+            ]
+            _require_function(contract, "issueCertificates")
+            call = contract.functions.issueCertificates(inputs)
+        tx_hashes.append(call.transact({"from": sender}).to_0x_hex())
+    return tx_hashes
+
+
+def event_certificate_id(event) -> str:
+    """Certificate ID of a registry event as the hex string used everywhere else."""
+    cert_id = event["args"]["certificateId"]
+    return cert_id.hex() if isinstance(cert_id, bytes) else cert_id
+
+
+def fetch_registry_events(contract, from_block: int, to_block: int,
+                          names: tuple = ISSUE_EVENTS + REVOKE_EVENTS) -> list:
+    """Decodes the named registry events in a block range with a single eth_getLogs."""
+    events = {}
+    for name in names:
+        if _has_function(contract, name, kind="event"):
+            event = getattr(contract.events, name)()
+            events[event.topic] = event
+    if not events or from_block > to_block:
+        return []
+
+    logs = contract.w3.eth.get_logs({
+        "address": contract.address,
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "topics": [list(events)],
+    })
+    return [events[Web3.to_hex(log["topics"][0])].process_log(log) for log in logs]
+
@@ -0,0 +1,198 @@
+"""Bloom filter of every issued certificate ID, so unknown IDs are rejected without an eth_call.
+
+A Bloom filter never gives false negatives: an ID that was issued always
+tests positive, and only the (rare) positives for IDs that were never
+issued still go to the chain. The filter is rebuilt from issue events,
+kept up to date by tailing them, and saved to disk so restarts only fetch
+new blocks.
+"""
+import os
+import json
+import math
+import argparse
+import hashlib
+import threading
+from dotenv import load_dotenv
+from metrics import inc, gauge
+from merkle import open_proof_store
+from blockchain import load_contract, fetch_registry_events, event_certificate_id, ISSUE_EVENTS, ANCHOR_EVENTS
+
+BLOOM_PATH = "issued_ids.bloom"
+BLOOM_CAPACITY = 1_000_000
+BLOOM_ERROR_RATE = 0.001
+
+
+class BloomFilter:
+    """Fixed-size bit array sized for ``capacity`` items at ``error_rate`` false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list:
+        # Double hashing: k positions from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """Sets the item's bits; returns False if they were all set already."""
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path: str, **meta) -> None:
+        """Writes a one-line JSON header followed by the raw bits, atomically."""
+        header = {"capacity": self.capacity, "error_rate": self.error_rate, "count": self.count, **meta}
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> tuple:
+        """Returns (filter, header) as written by ``save``."""
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            bloom = cls(header["capacity"], header["error_rate"])
+            bits = f.read()
+        if len(bits) != len(bloom.bits):
+            raise ValueError(f"Corrupt Bloom filter file: {path}")
+        bloom.bits = bytearray(bits)
+        bloom.count = header["count"]
+        return bloom, header
+
+
+def normalize_id(cert_id: str) -> str:
+    # Lookups accept 0x-prefixed and upper-case IDs, so the filter must too.
+    return cert_id.strip().removeprefix("0x").lower()
+
+
+class IssuedIdFilter:
+    """Bloom filter of issued certificate IDs for one deployment, synced from registry events.
+
+    Certificates anchored under a Merkle root have no per-certificate event,
+    so their IDs come from the local proof store when the root's event is
+    seen. Roots whose proofs are not in the store yet (e.g. proofs.db is
+    copied over later) are retried on every sync, and until then IDs with
+    a proof under such a root are let through. Once more IDs than ``capacity`` are recorded the filter is rebuilt
+    twice as large, keeping the false positive rate near ``error_rate``.
+    """
+
+    def __init__(self, contract, path: str = BLOOM_PATH, capacity: int = BLOOM_CAPACITY,
+                 error_rate: float = BLOOM_ERROR_RATE, block_batch: int = 2000):
+        self.contract = contract
+        self.path = path
+        self.block_batch = block_batch
+        self.rejections = 0
+        self._lock = threading.Lock()
+        self.bloom, self.last_block = BloomFilter(capacity, error_rate), -1
+        self.unresolved_roots = set()
+        if os.path.exists(path):
+            try:
+                bloom, header = BloomFilter.load(path)
+                # A filter saved for another deployment would reject its real IDs.
+                if header.get("contract") == contract.address:
+                    self.bloom, self.last_block = bloom, header["last_block"]
+                    self.unresolved_roots = set(header.get("unresolved_roots", []))
+            except (ValueError, KeyError) as e:
+                print(f"⚠️ Ignoring unreadable Bloom filter {path}: {e}")
+        gauge("bloom_ids", lambda: self.bloom.count)
+        gauge("bloom_bytes", lambda: len(self.bloom.bits))
+
+    def _add_root(self, root: str) -> int:
+        """Adds the IDs anchored under ``root``; remembers the root if the proof store lacks them."""
+        store = open_proof_store()
+        cert_ids = store.cert_ids(root) if store else []
+        if not cert_ids:
+            self.unresolved_roots.add(root)
+            return 0
+        self.unresolved_roots.discard(root)
+        return sum(self.bloom.add(normalize_id(cert_id)) for cert_id in cert_ids)
+
+    def _scan(self, to_block: int) -> int:
+        added = sum(self._add_root(root) for root in list(self.unresolved_roots))
+        for start in range(self.last_block + 1, to_block + 1, self.block_batch):
+            end = min(start + self.block_batch - 1, to_block)
+            for event in fetch_registry_events(self.contract, start, end, names=ISSUE_EVENTS + ANCHOR_EVENTS):
+                if event["event"] in ANCHOR_EVENTS:
+                    added += self._add_root(event["args"]["root"].hex())
+                else:
+                    added += self.bloom.add(normalize_id(event_certificate_id(event)))
+            self.last_block = end
+        return added
+
+    def sync(self, to_block: int = None) -> int:
+        """Adds IDs issued up to ``to_block`` (default: latest); returns how many were new."""
+        with self._lock:
+            if to_block is None:
+                to_block = self.contract.w3.eth.block_number
+            unresolved = set(self.unresolved_roots)
+            added = self._scan(to_block)
+            while self.bloom.count > self.bloom.capacity:
+                # Rescan everything into a filter sized for the growth.
+                self.bloom = BloomFilter(self.bloom.capacity * 2, self.bloom.error_rate)
+                self.last_block = -1
+                self.unresolved_roots = set()
+                added = self._scan(to_block)
+            if added or self.unresolved_roots != unresolved:
+                self.bloom.save(self.path, contract=self.contract.address, last_block=self.last_block,
+                                unresolved_roots=sorted(self.unresolved_roots))
+            return added
+
+    def might_contain(self, cert_id: str) -> bool:
+        """False means the ID was definitely never issued (as of the last sync)."""
+        if normalize_id(cert_id) in self.bloom or self._under_unresolved_root(cert_id):
+            return True
+        self.rejections += 1
+        inc("bloom_rejections")
+        return False
+
+    def _under_unresolved_root(self, cert_id: str) -> bool:
+        # Without a proof the certificate cannot verify anyway, so only IDs with one need a chain lookup.
+        if not self.unresolved_roots:
+            return False
+        store = open_proof_store()
+        record = store.get(cert_id) if store else None
+        return record is not None and record["root"] in self.unresolved_roots
+
+    def stats(self) -> dict:
+        return {"ids": self.bloom.count, "bytes": len(self.bloom.bits), "hashes": self.bloom.hashes,
+                "last_block": self.last_block, "rejections": self.rejections,
+                "unresolved_roots": len(self.unresolved_roots)}
+
+
+def issued_id_filter(contract):
+    """IssuedIdFilter for the verification paths, or None when BLOOM_FILTER=0."""
+    if os.getenv("BLOOM_FILTER", "1") == "0":
+        return None
+    return IssuedIdFilter(contract, os.getenv("BLOOM_PATH", BLOOM_PATH))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the issued-ID Bloom filter.")
+    parser.add_argument("--path", default=BLOOM_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="Discard the saved filter and rescan from block 0")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.rebuild and os.path.exists(args.path):
+        os.remove(args.path)
+    id_filter = IssuedIdFilter(load_contract()[1], args.path)
+    added = id_filter.sync()
+    print(f"✅ {added} new IDs; {id_filter.stats()}")
@@ -0,0 +1,160 @@
+import time
+import threading
+from collections import OrderedDict
+from metrics import inc, gauge
+from blockchain import (
+    verify_certificate, verify_certificates, fetch_registry_events, event_certificate_id, missing_certificate,
+    ISSUE_EVENTS, REVOKE_EVENTS,
+)
+
+
+class VerificationCache:
+    """Bounded LRU of decoded verification results with separate positive/negative TTLs.
+
+    Negative results (IDs that were never issued) expire quickly so a freshly
+    issued certificate becomes visible soon, while still absorbing repeated
+    guesses at random IDs.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        gauge("cache_hit_ratio", lambda: self.stats()["hit_ratio"], cache="verification")
+        gauge("cache_entries", lambda: len(self._entries), cache="verification")
+
+    def get(self, cert_id: str):
+        with self._lock:
+            entry = self._entries.get(cert_id)
+            if entry is not None:
+                expires, cert = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(cert_id)
+                    self.hits += 1
+                    inc("cache_requests", cache="verification", result="hit")
+                    return cert
+                del self._entries[cert_id]
+            self.misses += 1
+            inc("cache_requests", cache="verification", result="miss")
+            return None
+
+    def put(self, cert_id: str, cert: dict) -> None:
+        ttl = self.ttl if cert["exists"] else self.negative_ttl
+        with self._lock:
+            self._entries[cert_id] = (time.monotonic() + ttl, cert)
+            self._entries.move_to_end(cert_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, cert_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(cert_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class CachedVerifier:
+    """Read-through cache in front of verifyCertificate.
+
+    Before serving from the cache it tails issue/revoke events (at most once
+    per ``sync_interval`` seconds) and drops the affected IDs, so a
+    revocation or a new issuance is never hidden for longer than that.
+    With an ``id_filter`` (see bloom.py), IDs it rules out are answered as
+    missing without touching the cache or the chain. With ``revocations``
+    (see revocations.py), revoke events no longer evict cached records;
+    results are marked revoked from the set instead.
+    """
+
+    def __init__(self, contract, cache: VerificationCache = None, sync_interval: float = 2.0, id_filter=None,
+                 revocations=None):
+        self.contract = contract
+        self.cache = cache or VerificationCache()
+        self.id_filter = id_filter
+        self.revocations = revocations
+        self.sync_interval = sync_interval
+        self._last_sync = 0.0
+        self._last_block = None
+        self._sync_lock = threading.Lock()
+
+    def sync_events(self, force: bool = False) -> None:
+        """Invalidates every ID touched by an issue/revoke event since the last sync."""
+        with self._sync_lock:
+            if not force and time.monotonic() - self._last_sync < self.sync_interval:
+                return
+            latest = self.contract.w3.eth.block_number
+            if self.id_filter is not None:
+                self.id_filter.sync(latest)
+            names = ISSUE_EVENTS + REVOKE_EVENTS
+            if self.revocations is not None:
+                self.revocations.sync(latest)
+                names = ISSUE_EVENTS
+            if self._last_block is None:
+                # Nothing is cached yet, so there is nothing older to invalidate.
+                self._last_block = latest
+            for event in fetch_registry_events(self.contract, self._last_block + 1, latest, names=names):
+                self.cache.invalidate(event_certificate_id(event))
+            self._last_block = latest
+            self._last_sync = time.monotonic()
+
+    def verify(self, cert_id: str) -> dict:
+        self.sync_events()
+        if self.id_filter is not None and not self.id_filter.might_contain(cert_id):
+            return missing_certificate(cert_id)
+        cert = self.cache.get(cert_id)
+        if cert is None:
+            cert = verify_certificate(self.contract, cert_id)
+            self.cache.put(cert_id, cert)
+        return self._mark_revoked(cert)
+
+    def verify_many(self, cert_ids: list) -> list:
+        self.sync_events()
+        results = {}
+        misses = []
+        for cert_id in dict.fromkeys(cert_ids):
+            if self.id_filter is not None and not self.id_filter.might_contain(cert_id):
+                results[cert_id] = missing_certificate(cert_id)
+                continue
+            cert = self.cache.get(cert_id)
+            if cert is None:
+                misses.append(cert_id)
+            else:
+                results[cert_id] = cert
+        for cert in verify_certificates(self.contract, misses):
+            self.cache.put(cert["cert_id"], cert)
+            results[cert["cert_id"]] = cert
+        return [self._mark_revoked(results[cert_id]) for cert_id in cert_ids]
+
+    def _mark_revoked(self, cert: dict) -> dict:
+        if self.revocations is None or not cert["exists"] or cert["revoked"]:
+            return cert
+        return {**cert, "revoked": True} if cert["cert_id"] in self.revocations else cert
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        if self.id_filter is not None:
+            stats["bloom"] = self.id_filter.stats()
+        if self.revocations is not None:
+            stats["revoked"] = len(self.revocations)
+        return stats
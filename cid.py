@@ -0,0 +1,195 @@
+"""IPFS CID helpers: compact on-chain encoding and local UnixFS CID computation.
+
+CIDs are computed the way ``ipfs add`` (and Pinata) build them by default:
+256 KiB chunks in a balanced DAG of at most 174 links per node. Version 0
+wraps every chunk in a UnixFS dag-pb node; version 1 uses raw leaves.
+"""
+import hashlib
+from io import BytesIO
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BASE32_ALPHABET = "abcdefghijklmnopqrstuvwxyz234567"
+
+SHA2_256 = 0x12
+DAG_PB = 0x70
+RAW = 0x55
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+UNIXFS_FILE = 2
+
+
+def base58_encode(data: bytes) -> str:
+    num = int.from_bytes(data, "big")
+    encoded = ""
+    while num:
+        num, rem = divmod(num, 58)
+        encoded = BASE58_ALPHABET[rem] + encoded
+    padding = len(data) - len(data.lstrip(b"\0"))
+    return BASE58_ALPHABET[0] * padding + encoded
+
+
+def base58_decode(text: str) -> bytes:
+    num = 0
+    for char in text:
+        index = BASE58_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid base58 character: {char!r}")
+        num = num * 58 + index
+    body = num.to_bytes((num.bit_length() + 7) // 8, "big")
+    padding = len(text) - len(text.lstrip(BASE58_ALPHABET[0]))
+    return b"\0" * padding + body
+
+
+def base32_encode(data: bytes) -> str:
+    bits = 0
+    value = 0
+    out = []
+    for byte in data:
+        value = (value << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            out.append(BASE32_ALPHABET[(value >> bits) & 0x1F])
+    if bits:
+        out.append(BASE32_ALPHABET[(value << (5 - bits)) & 0x1F])
+    return "".join(out)
+
+
+def base32_decode(text: str) -> bytes:
+    bits = 0
+    value = 0
+    out = bytearray()
+    for char in text:
+        index = BASE32_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid base32 character: {char!r}")
+        value = (value << 5) | index
+        bits += 5
+        if bits >= 8:
+            bits -= 8
+            out.append((value >> bits) & 0xFF)
+    return bytes(out)
+
+
+def read_varint(data: bytes, offset: int = 0) -> tuple:
+    """Returns (value, next_offset) for an unsigned LEB128 varint."""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def cid_to_digest(cid: str) -> bytes:
+    """Extracts the 32-byte SHA-256 digest from a dag-pb CID (v0, or v1 in base32)."""
+    if cid.startswith("Qm"):
+        multihash = base58_decode(cid)
+    elif cid.startswith("b"):
+        raw = base32_decode(cid[1:])
+        version, offset = read_varint(raw)
+        codec, offset = read_varint(raw, offset)
+        if version != 1 or codec != DAG_PB:
+            raise ValueError(f"Only dag-pb CIDs can be stored compactly: {cid}")
+        multihash = raw[offset:]
+    else:
+        raise ValueError(f"Unsupported CID encoding: {cid}")
+
+    if len(multihash) != 34 or multihash[0] != SHA2_256 or multihash[1] != 32:
+        raise ValueError(f"CID is not a sha2-256 multihash: {cid}")
+    return multihash[2:]
+
+
+def digest_to_cid(digest: bytes) -> str:
+    """Rebuilds the CIDv0 string for a dag-pb SHA-256 digest."""
+    if len(digest) != 32:
+        raise ValueError("Digest must be 32 bytes")
+    return base58_encode(bytes([SHA2_256, 32]) + digest)
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _pb_varint(field: int, value: int) -> bytes:
+    return encode_varint(field << 3) + encode_varint(value)
+
+
+def _pb_bytes(field: int, data: bytes) -> bytes:
+    return encode_varint(field << 3 | 2) + encode_varint(len(data)) + data
+
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes: list = ()) -> bytes:
+    """Serializes a UnixFS Data message of type File."""
+    message = _pb_varint(1, UNIXFS_FILE)
+    if data:
+        message += _pb_bytes(2, data)
+    message += _pb_varint(3, filesize)
+    for size in blocksizes:
+        message += _pb_varint(4, size)
+    return message
+
+
+def _cid_bytes(codec: int, block: bytes, version: int) -> bytes:
+    multihash = bytes([SHA2_256, 32]) + hashlib.sha256(block).digest()
+    if version == 0:
+        return multihash
+    return encode_varint(1) + encode_varint(codec) + multihash
+
+
+def _cid_string(cid: bytes, version: int) -> str:
+    return base58_encode(cid) if version == 0 else "b" + base32_encode(cid)
+
+
+def _leaf(chunk: bytes, version: int) -> tuple:
+    """Returns (cid_bytes, filesize, tsize) for one chunk."""
+    if version == 0:
+        block = _pb_bytes(1, _unixfs_file(chunk, len(chunk)))
+        return _cid_bytes(DAG_PB, block, version), len(chunk), len(block)
+    return _cid_bytes(RAW, chunk, version), len(chunk), len(chunk)
+
+
+def _parent(children: list, version: int) -> tuple:
+    links = b"".join(
+        _pb_bytes(2, _pb_bytes(1, cid) + _pb_bytes(2, b"") + _pb_varint(3, tsize))
+        for cid, _, tsize in children
+    )
+    filesize = sum(size for _, size, _ in children)
+    block = links + _pb_bytes(1, _unixfs_file(b"", filesize, [size for _, size, _ in children]))
+    return _cid_bytes(DAG_PB, block, version), filesize, len(block) + sum(tsize for _, _, tsize in children)
+
+
+def compute_stream_cid(stream, version: int = 0, chunk_size: int = CHUNK_SIZE) -> str:
+    """CID ``ipfs add`` would assign to the stream's content, read one chunk at a time.
+
+    Only (cid, size) per chunk is kept, so memory stays small for any file size.
+    """
+    if version not in (0, 1):
+        raise ValueError(f"Unsupported CID version: {version}")
+    nodes = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk and nodes:
+            break
+        nodes.append(_leaf(chunk, version))
+        if len(chunk) < chunk_size:
+            break
+    while len(nodes) > 1:
+        nodes = [_parent(nodes[i:i + MAX_LINKS], version) for i in range(0, len(nodes), MAX_LINKS)]
+    return _cid_string(nodes[0][0], version)
+
+
+def compute_cid(data: bytes, version: int = 0, chunk_size: int = CHUNK_SIZE) -> str:
+    """CID ``ipfs add`` would assign to ``data`` (CIDv0 by default, like Pinata)."""
+    return compute_stream_cid(BytesIO(data), version, chunk_size)
@@ -15,11 +15,64 @@ contract CertificateRegistry is Ownable {
         string organization;
     }
 
+    struct CertificateInput {
+        string certificateId;
+        string cid;
+        string uid;
+        string candidateName;
+        string courseName;
+        string organization;
+    }
+
+    // Compact record keyed by the raw SHA-256 certificate ID. issuer, revoked and
+    // issuedAt share one slot; personal fields are only emitted in the issue event
+    // and committed to via detailsHash.
+    struct CompactCertificate {
+        address issuer;
+        bool revoked;
+        uint64 issuedAt;
+        bytes32 cidDigest;
+        bytes32 detailsHash;
+    }
+
+    struct CompactCertificateInput {
+        bytes32 certificateId;
+        bytes32 cidDigest;
+        string uid;
+        string candidateName;
+        string courseName;
+        string organization;
+    }
+
+    // One Merkle root covers a whole issuance batch; each certificate proves
+    // inclusion off-chain with its stored proof.
+    struct MerkleAnchor {
+        address issuer;
+        uint64 anchoredAt;
+        uint32 leafCount;
+    }
+
     mapping(string => Certificate) public certificates;
+    mapping(bytes32 => CompactCertificate) public compactCertificates;
+    mapping(bytes32 => MerkleAnchor) public merkleAnchors;
+    // Anchored certificates have no record of their own, so revocations are kept per root.
+    mapping(bytes32 => mapping(bytes32 => bool)) public anchoredRevoked;
     mapping(address => bool) public isIssuer;
 
     event CertificateIssued(string certificateId, string cid, address issuer);
     event CertificateRevoked(string certificateId);
+    event CompactCertificateIssued(
+        bytes32 indexed certificateId,
+        bytes32 cidDigest,
+        address indexed issuer,
+        string uid,
+        string candidateName,
+        string courseName,
+        string organization
+    );
+    event CompactCertificateRevoked(bytes32 indexed certificateId);
+    event RootAnchored(bytes32 indexed root, address indexed issuer, uint32 leafCount);
+    event AnchoredCertificateRevoked(bytes32 indexed certificateId, bytes32 indexed root);
 
     // Constructor to initialize owner and add initial issuer
     constructor(address initialOwner) Ownable(initialOwner) {
@@ -35,6 +88,32 @@ contract CertificateRegistry is Ownable {
         string memory courseName,
         string memory organization
     ) public {
+        _issue(certificateId, cid, uid, candidateName, courseName, organization);
+    }
+
+    // Issue many certificates in a single transaction
+    function issueCertificates(CertificateInput[] memory inputs) public {
+        for (uint256 i = 0; i < inputs.length; i++) {
+            CertificateInput memory input = inputs[i];
+            _issue(
+                input.certificateId,
+                input.cid,
+                input.uid,
+                input.candidateName,
+                input.courseName,
+                input.organization
+            );
+        }
+    }
+
+    function _issue(
+        string memory certificateId,
+        string memory cid,
+        string memory uid,
+        string memory candidateName,
+        string memory courseName,
+        string memory organization
+    ) internal {
         require(bytes(certificates[certificateId].cid).length == 0, "Certificate already exists");
 
         certificates[certificateId] = Certificate({
@@ -51,13 +130,26 @@ contract CertificateRegistry is Ownable {
         emit CertificateIssued(certificateId, cid, msg.sender);
     }
 
+    // The issuer of a certificate and the contract owner may revoke it
+    function _checkRevoker(address issuer) internal view {
+        require(issuer != address(0), "Certificate does not exist");
+        require(issuer == msg.sender || msg.sender == owner(), "Only issuer or owner can revoke");
+    }
+
     // Revoke an existing certificate
     function revokeCertificate(string memory certificateId) public {
-        require(certificates[certificateId].issuer == msg.sender, "Only issuer can revoke");
+        _checkRevoker(certificates[certificateId].issuer);
         certificates[certificateId].revoked = true;
         emit CertificateRevoked(certificateId);
     }
 
+    // Revoke many certificates in a single transaction
+    function revokeCertificates(string[] memory certificateIds) public {
+        for (uint256 i = 0; i < certificateIds.length; i++) {
+            revokeCertificate(certificateIds[i]);
+        }
+    }
+
     // Verify a certificate
     function verifyCertificate(string memory certificateId) public view returns (
         bool exists,
@@ -85,4 +177,124 @@ contract CertificateRegistry is Ownable {
             cert.issuedAt
         );
     }
+
+    // Verify many certificates in a single call; missing entries have an empty cid
+    function verifyCertificates(string[] memory certificateIds) public view returns (Certificate[] memory) {
+        Certificate[] memory result = new Certificate[](certificateIds.length);
+        for (uint256 i = 0; i < certificateIds.length; i++) {
+            result[i] = certificates[certificateIds[i]];
+        }
+        return result;
+    }
+
+    // Issue a certificate in the compact bytes32-keyed layout
+    function issueCompactCertificate(
+        bytes32 certificateId,
+        bytes32 cidDigest,
+        string memory uid,
+        string memory candidateName,
+        string memory courseName,
+        string memory organization
+    ) public {
+        _issueCompact(certificateId, cidDigest, uid, candidateName, courseName, organization);
+    }
+
+    // Issue many compact certificates in a single transaction
+    function issueCompactCertificates(CompactCertificateInput[] memory inputs) public {
+        for (uint256 i = 0; i < inputs.length; i++) {
+            CompactCertificateInput memory input = inputs[i];
+            _issueCompact(
+                input.certificateId,
+                input.cidDigest,
+                input.uid,
+                input.candidateName,
+                input.courseName,
+                input.organization
+            );
+        }
+    }
+
+    function _issueCompact(
+        bytes32 certificateId,
+        bytes32 cidDigest,
+        string memory uid,
+        string memory candidateName,
+        string memory courseName,
+        string memory organization
+    ) internal {
+        require(compactCertificates[certificateId].issuer == address(0), "Certificate already exists");
+
+        compactCertificates[certificateId] = CompactCertificate({
+            issuer: msg.sender,
+            revoked: false,
+            issuedAt: uint64(block.timestamp),
+            cidDigest: cidDigest,
+            detailsHash: keccak256(abi.encode(uid, candidateName, courseName, organization))
+        });
+
+        emit CompactCertificateIssued(
+            certificateId, cidDigest, msg.sender, uid, candidateName, courseName, organization
+        );
+    }
+
+    // Revoke a compact certificate
+    function revokeCompactCertificate(bytes32 certificateId) public {
+        _checkRevoker(compactCertificates[certificateId].issuer);
+        compactCertificates[certificateId].revoked = true;
+        emit CompactCertificateRevoked(certificateId);
+    }
+
+    function revokeCompactCertificates(bytes32[] memory certificateIds) public {
+        for (uint256 i = 0; i < certificateIds.length; i++) {
+            revokeCompactCertificate(certificateIds[i]);
+        }
+    }
+
+    // Verify many compact certificates in a single call; missing entries have a zero issuer
+    function verifyCompactCertificates(bytes32[] memory certificateIds) public view returns (CompactCertificate[] memory) {
+        CompactCertificate[] memory result = new CompactCertificate[](certificateIds.length);
+        for (uint256 i = 0; i < certificateIds.length; i++) {
+            result[i] = compactCertificates[certificateIds[i]];
+        }
+        return result;
+    }
+
+    // Anchor the Merkle root of a batch of certificates
+    function anchorRoot(bytes32 root, uint32 leafCount) public {
+        require(merkleAnchors[root].issuer == address(0), "Root already anchored");
+        merkleAnchors[root] = MerkleAnchor({
+            issuer: msg.sender,
+            anchoredAt: uint64(block.timestamp),
+            leafCount: leafCount
+        });
+        emit RootAnchored(root, msg.sender, leafCount);
+    }
+
+    // Look up anchored roots in a single call; unknown roots have a zero issuer
+    function verifyRoots(bytes32[] memory roots) public view returns (MerkleAnchor[] memory) {
+        MerkleAnchor[] memory result = new MerkleAnchor[](roots.length);
+        for (uint256 i = 0; i < roots.length; i++) {
+            result[i] = merkleAnchors[roots[i]];
+        }
+        return result;
+    }
+
+    // Revoke certificates anchored under a root; membership is proven off-chain like verification
+    function revokeAnchoredCertificates(bytes32 root, bytes32[] memory certificateIds) public {
+        _checkRevoker(merkleAnchors[root].issuer);
+        for (uint256 i = 0; i < certificateIds.length; i++) {
+            anchoredRevoked[root][certificateIds[i]] = true;
+            emit AnchoredCertificateRevoked(certificateIds[i], root);
+        }
+    }
+
+    // Revocation flags for (root, certificate) pairs in a single call
+    function verifyAnchoredRevocations(bytes32[] memory roots, bytes32[] memory certificateIds) public view returns (bool[] memory) {
+        require(roots.length == certificateIds.length, "Length mismatch");
+        bool[] memory result = new bool[](roots.length);
+        for (uint256 i = 0; i < roots.length; i++) {
+            result[i] = anchoredRevoked[roots[i]][certificateIds[i]];
+        }
+        return result;
+    }
 }
@@ -0,0 +1,243 @@
+import time
+import sqlite3
+import argparse
+from contextlib import closing
+from dotenv import load_dotenv
+from cid import digest_to_cid
+from merkle import open_proof_store
+from blockchain import (
+    load_contract, verify_certificates, fetch_registry_events, event_certificate_id,
+    ISSUE_EVENTS, REVOKE_EVENTS, ANCHOR_EVENTS,
+)
+
+INDEX_PATH = "certificate_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS certificates (
+    cert_id TEXT PRIMARY KEY,
+    uid TEXT,
+    name TEXT,
+    course TEXT,
+    org TEXT,
+    cid TEXT,
+    issuer TEXT,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    issued_at INTEGER,
+    block_number INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_certificates_uid ON certificates (uid);
+CREATE INDEX IF NOT EXISTS idx_certificates_name ON certificates (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_certificates_course ON certificates (course COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pending_roots (
+    root TEXT PRIMARY KEY,
+    issuer TEXT,
+    issued_at INTEGER,
+    block_number INTEGER
+);
+CREATE TABLE IF NOT EXISTS pending_revocations (
+    cert_id TEXT PRIMARY KEY
+);
+"""
+
+COLUMNS = ("cert_id", "uid", "name", "course", "org", "cid", "issuer", "revoked", "issued_at", "block_number")
+
+
+class CertificateIndex:
+    """Local SQLite index of every certificate, built from CertificateRegistry logs.
+
+    ``sync`` tails issue/revoke events in block-range batches and records the
+    last synced block, so restarts only fetch what is new. Lookups by UID,
+    name or course never touch the node.
+
+    Certificates anchored under a Merkle root are read from the local proof
+    store; roots it does not hold yet are kept pending and retried on every
+    sync. The index belongs to one deployment and is rebuilt when the
+    contract address changes.
+    """
+
+    def __init__(self, contract, path: str = INDEX_PATH, block_batch: int = 2000):
+        self.contract = contract
+        self.path = path
+        self.block_batch = block_batch
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            row = conn.execute("SELECT value FROM sync_state WHERE key = 'contract'").fetchone()
+            if row is None or row["value"] != contract.address:
+                # Certificates and sync progress of another deployment do not apply to this one.
+                conn.execute("DELETE FROM certificates")
+                conn.execute("DELETE FROM pending_roots")
+                conn.execute("DELETE FROM pending_revocations")
+                conn.execute("DELETE FROM sync_state")
+                conn.execute("INSERT INTO sync_state (key, value) VALUES ('contract', ?)", (contract.address,))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def last_block(self) -> int:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = 'last_block'").fetchone()
+        return row["value"] if row else -1
+
+    def sync(self, to_block: int = None, on_progress=None) -> int:
+        """Indexes events up to ``to_block`` (default: latest) and returns the number of events seen."""
+        latest = self.contract.w3.eth.block_number if to_block is None else to_block
+        seen = 0
+        start = self.last_block() + 1
+        if start > latest:
+            # No new blocks, but proofs for pending roots may have arrived since.
+            self._apply([], start - 1)
+        while start <= latest:
+            end = min(start + self.block_batch - 1, latest)
+            events = fetch_registry_events(
+                self.contract, start, end, names=ISSUE_EVENTS + REVOKE_EVENTS + ANCHOR_EVENTS
+            )
+            self._apply(events, end)
+            seen += len(events)
+            if on_progress:
+                on_progress(end, latest)
+            start = end + 1
+        return seen
+
+    def _apply(self, events: list, end_block: int) -> None:
+        rows = {}
+        string_ids = {}
+        revoked = []
+        block_times = {}
+        roots = {}
+        for event in events:
+            if event["event"] in ANCHOR_EVENTS:
+                block = event["blockNumber"]
+                if block not in block_times:
+                    block_times[block] = self.contract.w3.eth.get_block(block)["timestamp"]
+                roots[event["args"]["root"].hex()] = (event["args"]["issuer"], block_times[block], block)
+                continue
+            cert_id = event_certificate_id(event)
+            if event["event"] in REVOKE_EVENTS:
+                revoked.append(cert_id)
+            elif event["event"] == "CertificateIssued":
+                string_ids[cert_id] = event["blockNumber"]
+            else:
+                args = event["args"]
+                block = event["blockNumber"]
+                if block not in block_times:
+                    block_times[block] = self.contract.w3.eth.get_block(block)["timestamp"]
+                rows[cert_id] = (
+                    cert_id, args["uid"], args["candidateName"], args["courseName"], args["organization"],
+                    digest_to_cid(args["cidDigest"]), args["issuer"], 0, block_times[block], block,
+                )
+
+        # String-keyed events only carry the ID and CID; read the records in batched calls.
+        for cert in verify_certificates(self.contract, list(string_ids)):
+            rows[cert["cert_id"]] = (
+                cert["cert_id"], cert["uid"], cert["name"], cert["course"], cert["org"], cert["cid"],
+                cert["issuer"], int(cert["revoked"]), cert["issued_at"], string_ids[cert["cert_id"]],
+            )
+
+        with closing(self._connect()) as conn, conn:
+            for row in conn.execute("SELECT * FROM pending_roots"):
+                roots.setdefault(row["root"], (row["issuer"], row["issued_at"], row["block_number"]))
+            anchored, pending = self._anchored_rows(roots)
+            rows.update(anchored)
+            conn.execute("DELETE FROM pending_roots")
+            conn.executemany(
+                "INSERT INTO pending_roots (root, issuer, issued_at, block_number) VALUES (?, ?, ?, ?)",
+                [(root, *pending[root]) for root in pending],
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO certificates ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows.values(),
+            )
+            # Revocations of certificates under a pending root wait until the root resolves.
+            conn.execute("UPDATE certificates SET revoked = 1 WHERE cert_id IN (SELECT cert_id FROM pending_revocations)")
+            conn.execute("DELETE FROM pending_revocations WHERE cert_id IN (SELECT cert_id FROM certificates)")
+            for cert_id in revoked:
+                if conn.execute("UPDATE certificates SET revoked = 1 WHERE cert_id = ?", (cert_id,)).rowcount == 0:
+                    conn.execute("INSERT OR IGNORE INTO pending_revocations (cert_id) VALUES (?)", (cert_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_block', ?)", (end_block,)
+            )
+
+    @staticmethod
+    def _anchored_rows(roots: dict) -> tuple:
+        """Rows for the certificates under ``roots`` (root -> issuer, time, block), plus the roots not in the proof store."""
+        store = open_proof_store()
+        rows, pending = {}, {}
+        for root, (issuer, issued_at, block) in roots.items():
+            cert_ids = store.cert_ids(root) if store else []
+            if not cert_ids:
+                pending[root] = (issuer, issued_at, block)
+                continue
+            for cert_id, record in store.get_many(cert_ids).items():
+                rows[cert_id] = (
+                    cert_id, record["uid"], record["name"], record["course"], record["org"], record["cid"],
+                    issuer, 0, issued_at, block,
+                )
+        return rows, pending
+
+    def get(self, cert_id: str):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM certificates WHERE cert_id = ?", (cert_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, uid: str = None, name: str = None, course: str = None, limit: int = 100) -> list:
+        """Exact match on UID, case-insensitive substring match on name and course."""
+        clauses, params = [], []
+        if uid:
+            clauses.append("uid = ?")
+            params.append(uid)
+        if name:
+            clauses.append("name LIKE ? COLLATE NOCASE")
+            params.append(f"%{name}%")
+        if course:
+            clauses.append("course LIKE ? COLLATE NOCASE")
+            params.append(f"%{course}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM certificates {where} ORDER BY issued_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, revoked: bool = None) -> int:
+        query = "SELECT COUNT(*) FROM certificates"
+        params = ()
+        if revoked is not None:
+            query += " WHERE revoked = ?"
+            params = (int(revoked),)
+        with closing(self._connect()) as conn:
+            return conn.execute(query, params).fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync and query the local certificate index.")
+    parser.add_argument("--db", default=INDEX_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="Index new CertificateRegistry events")
+    search_parser = sub.add_parser("search", help="Look certificates up by UID, name or course")
+    search_parser.add_argument("--uid")
+    search_parser.add_argument("--name")
+    search_parser.add_argument("--course")
+    search_parser.add_argument("--limit", type=int, default=100)
+    sub.add_parser("count", help="Count indexed certificates")
+    args = parser.parse_args()
+
+    load_dotenv()
+    index = CertificateIndex(load_contract()[1], args.db)
+
+    if args.command == "sync":
+        start = time.perf_counter()
+        seen = index.sync(on_progress=lambda block, latest: print(f"⏳ Indexed up to block {block}/{latest}"))
+        print(f"✅ {seen} events indexed in {time.perf_counter() - start:.1f}s, "
+              f"{index.count()} certificates total")
+    elif args.command == "search":
+        for row in index.search(args.uid, args.name, args.course, args.limit):
+            print(row)
+    else:
+        print(f"{index.count()} certificates ({index.count(revoked=True)} revoked)")
@@ -1,79 +1,339 @@
 import os
+import time
+import json
+import sqlite3
+import random
+import threading
 import hashlib
+import unicodedata
+from typing import NamedTuple
+from io import BytesIO
+from functools import lru_cache
+from contextlib import closing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from PIL import Image as PILImage
 import requests
+from requests.adapters import HTTPAdapter
+from cid import compute_cid
+from metrics import timed, inc, observe, gauge
+
+LOGO_SIZE = 150
+LOGO_PIXELS = 600
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bump whenever build_certificate's output changes, so content hashes of the
+# old layout are not mistaken for the new one.
+CERTIFICATE_LAYOUT = 1
+PDF_CREATOR = "Certificate Verification Using Blockchain"
+
+PINATA_API_URL = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+PINATA_TIMEOUT = (5, 60)
+PINATA_RETRIES = 5
+PINATA_BACKOFF = 0.5
+PINATA_BACKOFF_MAX = 30.0
+UPLOAD_WORKERS = 8
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Pin as CIDv0 so the returned hash matches cid.compute_cid.
+PINATA_OPTIONS = {"pinataOptions": json.dumps({"cidVersion": 0})}
+PIN_INDEX_PATH = "pin_index.db"
+
 
 def upload_to_pinata(filepath: str) -> str:
     """Uploads the file to Pinata and returns the CID (IPFS hash)."""
+    with open(filepath, "rb") as file:
+        return _pin_file(file.read(), os.path.basename(filepath))
+
+
+def upload_bytes_to_pinata(data: bytes, filename: str) -> str:
+    """Uploads an in-memory file to Pinata and returns the CID (IPFS hash)."""
+    return _pin_file(data, filename)
+
+
+@lru_cache(maxsize=None)
+def _upload_session() -> requests.Session:
+    """One keep-alive session per process, sized for the upload pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _retry_delay(attempt: int, response=None) -> float:
+    """Honours Retry-After when the server sends one, else exponential backoff with jitter."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), PINATA_BACKOFF_MAX)
+    return min(PINATA_BACKOFF * 2 ** attempt, PINATA_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+
+
+def _pin_file(data: bytes, filename: str) -> str:
     api_key = os.getenv("PINATA_API_KEY")
     api_secret = os.getenv("PINATA_API_SECRET")
 
     if not api_key or not api_secret:
         raise EnvironmentError("Pinata API credentials are missing in .env")
 
-    url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+    url = os.getenv("PINATA_API_URL", PINATA_API_URL)
     headers = {
         "pinata_api_key": api_key,
         "pinata_secret_api_key": api_secret,
     }
+    cid = post_file(url, data, filename, headers=headers, form=PINATA_OPTIONS)["IpfsHash"]
+    print(f"Uploaded to IPFS: {cid}")
+    return cid
 
-    with open(filepath, "rb") as file:
-        files = {
-            "file": (os.path.basename(filepath), file),
-        }
-        response = requests.post(url, files=files, headers=headers)
-
-    if response.status_code == 200:
-        cid = response.json()["IpfsHash"]
-        print(f"Uploaded to IPFS: {cid}")
-        return cid
-    else:
-        print(f"Failed to upload to IPFS: {response.status_code}, {response.text}")
-        raise Exception("IPFS upload failed")
 
+def post_file(url: str, data: bytes, filename: str, headers: dict = None, form: dict = None,
+              params: dict = None) -> dict:
+    """POSTs one multipart file over the pooled session, retrying 429/5xx and connection errors.
 
-def generate_certificate(output_path: str, uid: str, candidate_name: str, course_name: str, logo_path: str) -> None:
-    doc = SimpleDocTemplate(output_path, pagesize=letter)
-    elements = []
-    
+    Returns the decoded JSON response.
+    """
+    for attempt in range(PINATA_RETRIES + 1):
+        response = None
+        if attempt:
+            inc("ipfs_upload_retries")
+        try:
+            response = _upload_session().post(
+                url, files={"file": (filename, data)}, data=form, params=params,
+                headers=headers, timeout=PINATA_TIMEOUT,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == PINATA_RETRIES:
+                raise Exception(f"IPFS upload failed: {e}") from e
+        else:
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code not in RETRY_STATUSES or attempt == PINATA_RETRIES:
+                print(f"Failed to upload to IPFS: {response.status_code}, {response.text}")
+                raise Exception("IPFS upload failed")
+        time.sleep(_retry_delay(attempt, response))
+
+
+def fetch_bytes(url: str, method: str = "GET", params: dict = None) -> bytes:
+    """Downloads a file over the pooled session."""
+    with timed("ipfs_fetch"):
+        response = _upload_session().request(method, url, params=params, timeout=PINATA_TIMEOUT)
+    if response.status_code != 200:
+        raise Exception(f"IPFS fetch failed: {response.status_code}")
+    return response.content
+
+
+class PinIndex:
+    """Local SQLite record of every CID already pinned, so identical content is never re-uploaded.
+
+    Entries are kept per storage backend, so switching backends uploads again.
+    """
+
+    def __init__(self, path: str = PIN_INDEX_PATH, backend: str = "pinata"):
+        self.path = path
+        self.backend = backend
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pins (backend TEXT, cid TEXT, size INTEGER, filename TEXT, "
+                "pinned_at REAL, PRIMARY KEY (backend, cid))"
+            )
+
+    def __contains__(self, cid: str) -> bool:
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            row = conn.execute("SELECT 1 FROM pins WHERE backend = ? AND cid = ?", (self.backend, cid)).fetchone()
+        return row is not None
+
+    def add(self, cid: str, size: int, filename: str) -> None:
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO pins VALUES (?, ?, ?, ?, ?)", (self.backend, cid, size, filename, time.time())
+            )
+
+
+class UploadQueue:
+    """Bounded pool of upload workers shared by the UI and batch runs.
+
+    ``submit`` returns immediately with a Future, so callers never block on
+    Pinata; at most ``workers`` uploads run at once over the pooled session.
+    With a PinIndex, content whose locally computed CID is already pinned is
+    skipped, and a pin that comes back under a different CID fails loudly.
+    """
+
+    def __init__(self, workers: int = UPLOAD_WORKERS, upload=None, index: PinIndex = None):
+        self.workers = workers
+        self.index = index
+        self._upload = upload or upload_bytes_to_pinata
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pinata")
+        self._lock = threading.Lock()
+        self.counts = {"queued": 0, "uploaded": 0, "deduplicated": 0, "failed": 0}
+        gauge("upload_queue_pending", lambda: self.counts["queued"])
+
+    def submit(self, data: bytes, filename: str, cid: str = None) -> Future:
+        with self._lock:
+            self.counts["queued"] += 1
+        future = self._pool.submit(self._pin, data, filename, cid)
+        future.add_done_callback(self._record)
+        return future
+
+    def upload_many(self, items: list) -> list:
+        """Uploads (data, filename) pairs concurrently and returns the CIDs in order."""
+        return [future.result() for future in [self.submit(data, name) for data, name in items]]
+
+    def _pin(self, data: bytes, filename: str, cid: str = None) -> str:
+        if self.index is not None:
+            cid = cid or compute_cid(data)
+            if cid in self.index:
+                self._count("deduplicated")
+                return cid
+        with timed("ipfs_upload"):
+            pinned = self._upload(data, filename)
+        if cid is not None and pinned != cid:
+            raise Exception(f"IPFS upload returned {pinned}, expected {cid}")
+        if self.index is not None:
+            self.index.add(pinned, len(data), filename)
+        self._count("uploaded")
+        return pinned
+
+    def _count(self, name: str) -> None:
+        inc("ipfs_pins", result=name)
+        with self._lock:
+            self.counts[name] += 1
+
+    def _record(self, future: Future) -> None:
+        with self._lock:
+            self.counts["queued"] -= 1
+            if future.exception():
+                self.counts["failed"] += 1
+                inc("ipfs_pins", result="failed")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+class HashingBuffer(BytesIO):
+    """In-memory PDF sink that updates the SHA-256 certificate ID as bytes are written."""
+
+    def __init__(self):
+        super().__init__()
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self._sha256.update(data)
+        return super().write(data)
+
+    @property
+    def certificate_id(self) -> str:
+        return self._sha256.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _certificate_styles() -> dict:
+    """Builds the certificate paragraph styles once per process."""
+    sample = getSampleStyleSheet()
+    return {
+        "institute": ParagraphStyle(
+            "InstituteStyle",
+            parent=sample["Title"],
+            fontName="Helvetica-Bold",
+            fontSize=18,
+            alignment=1,
+            spaceAfter=30,
+        ),
+        "title": ParagraphStyle(
+            "TitleStyle",
+            parent=sample["Title"],
+            fontName="Helvetica-Bold",
+            fontSize=24,
+            alignment=1,
+            spaceAfter=20,
+        ),
+        "recipient": ParagraphStyle(
+            "RecipientStyle",
+            parent=sample["BodyText"],
+            fontSize=14,
+            leading=18,
+            alignment=1,
+            spaceAfter=12,
+        ),
+    }
+
+
+@lru_cache(maxsize=8)
+def _logo_png(logo_path: str) -> bytes:
+    """Decodes and downsamples the logo once per process.
+
+    The source image is much larger than it is drawn, and ReportLab re-encodes
+    the pixels into every PDF, so it is downsampled to ~290 dpi first.
+    """
+    with PILImage.open(logo_path) as source:
+        logo = source.copy()
+    logo.thumbnail((LOGO_PIXELS, LOGO_PIXELS))
+    buffer = BytesIO()
+    logo.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _logo_flowable(logo_path: str) -> Image:
+    """A fresh Image per build: ReportLab keeps per-build state on the flowable, so threads cannot share one."""
+    return Image(BytesIO(_logo_png(logo_path)), width=LOGO_SIZE, height=LOGO_SIZE)
+
+
+def deterministic_pdfs() -> bool:
+    """Whether PDFs are rendered reproducibly (default); PDF_DETERMINISTIC=0 restores timestamps."""
+    return os.getenv("PDF_DETERMINISTIC", "1") != "0"
+
+
+def normalize_field(value) -> str:
+    """NFC-normalized text with whitespace runs collapsed, as it is laid out on the page."""
+    return " ".join(unicodedata.normalize("NFC", str(value)).split())
+
+
+def certificate_content_hash(uid: str, candidate_name: str, course_name: str) -> str:
+    """SHA-256 over the normalized fields and layout version of a certificate.
+
+    Cheap to compute without rendering: two rows with the same content hash
+    render to byte-identical PDFs (and so the same certificate ID) as long as
+    rendering is deterministic and the logo is unchanged.
+    """
+    payload = json.dumps({
+        "layout": CERTIFICATE_LAYOUT,
+        "uid": normalize_field(uid),
+        "name": normalize_field(candidate_name),
+        "course": normalize_field(course_name),
+    }, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@timed("pdf_build")
+def build_certificate(output, uid: str, candidate_name: str, course_name: str, logo_path: str,
+                      deterministic: bool = None) -> None:
+    """Renders a certificate into ``output``, a file path or a writable binary file object.
+
+    In deterministic mode ReportLab's ``invariant`` flag pins the creation
+    date and document ID, so the same fields always give the same bytes.
+    """
+    if deterministic is None:
+        deterministic = deterministic_pdfs()
+    uid, candidate_name, course_name = (normalize_field(value) for value in (uid, candidate_name, course_name))
     university_name = "Cairo University"
 
+    doc = SimpleDocTemplate(output, pagesize=letter, invariant=int(deterministic),
+                            title="Certificate of Completion", author=university_name, creator=PDF_CREATOR)
+    elements = []
+    styles = _certificate_styles()
+
     if logo_path and os.path.exists(logo_path):
-        logo = Image(logo_path, width=150, height=150)
-        elements.append(logo)
-
-    institute_style = ParagraphStyle(
-        "InstituteStyle",
-        parent=getSampleStyleSheet()["Title"],
-        fontName="Helvetica-Bold",
-        fontSize=18,
-        alignment=1,
-        spaceAfter=30,
-    )
-    institute = Paragraph(university_name, institute_style)
+        elements.append(_logo_flowable(logo_path))
+
+    institute = Paragraph(university_name, styles["institute"])
     elements.extend([institute, Spacer(1, 12)])
 
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=getSampleStyleSheet()["Title"],
-        fontName="Helvetica-Bold",
-        fontSize=24,
-        alignment=1,
-        spaceAfter=20,
-    )
-    title = Paragraph("Certificate of Completion", title_style)
+    title = Paragraph("Certificate of Completion", styles["title"])
     elements.extend([title, Spacer(1, 6)])
 
-    recipient_style = ParagraphStyle(
-        "RecipientStyle",
-        parent=getSampleStyleSheet()["BodyText"],
-        fontSize=14,
-        leading=18,
-        alignment=1,
-        spaceAfter=12,
-    )
     recipient_text = (
         "This is to certify that<br/><br/>"
         f"<b><font color='red'>{candidate_name}</font></b><br/>"
@@ -82,15 +342,104 @@ def generate_certificate(output_path: str, uid: str, candidate_name: str, course
         "has successfully completed the course<br/>"
         f"<b><font color='blue'>{course_name}</font></b>."
     )
-    recipient = Paragraph(recipient_text, recipient_style)
+    recipient = Paragraph(recipient_text, styles["recipient"])
     elements.append(recipient)
 
     doc.build(elements)
 
+
+def render_certificate(uid: str, candidate_name: str, course_name: str, logo_path: str) -> bytes:
+    """Renders a certificate in memory and returns the PDF bytes."""
+    buffer = BytesIO()
+    build_certificate(buffer, uid, candidate_name, course_name, logo_path)
+    return buffer.getvalue()
+
+
+def render_certificate_with_id(uid: str, candidate_name: str, course_name: str, logo_path: str) -> tuple:
+    """Renders a certificate in memory and returns (pdf_bytes, certificate_id)."""
+    buffer = HashingBuffer()
+    build_certificate(buffer, uid, candidate_name, course_name, logo_path)
+    return buffer.getvalue(), buffer.certificate_id
+
+
+def save_certificate(cert_id: str, pdf_bytes: bytes, out_dir: str = "certificates") -> str:
+    """Writes the PDF once under its content-addressed name and returns the path."""
+    os.makedirs(out_dir, exist_ok=True)
+    final_path = os.path.join(out_dir, f"{cert_id}.pdf")
+    temp_path = f"{final_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+def generate_certificate(output_path: str, uid: str, candidate_name: str, course_name: str, logo_path: str) -> None:
+    build_certificate(output_path, uid, candidate_name, course_name, logo_path)
+
     print(f"Certificate generated and saved at: {output_path}")
 
+
+def warm_renderer(logo_path: str) -> None:
+    """Process-pool initializer: builds styles and decodes the logo before the first job."""
+    _certificate_styles()
+    if logo_path and os.path.exists(logo_path):
+        _logo_png(logo_path)
+
+
+def _render_row(args: tuple) -> bytes:
+    return render_certificate(*args)
+
+
+def render_certificates(rows: list, logo_path: str, workers: int = None) -> list:
+    """Renders (uid, name, course) rows across a process pool, returning PDF bytes in order."""
+    workers = workers or os.cpu_count() or 1
+    jobs = [(uid, name, course, logo_path) for uid, name, course in rows]
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_renderer, initargs=(logo_path,)) as pool:
+        return list(pool.map(_render_row, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+class HashResult(NamedTuple):
+    certificate_id: str
+    size: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Bytes hashed per second."""
+        return self.size / self.seconds if self.seconds else float("inf")
+
+
+def hash_stream(stream, chunk_size: int = HASH_CHUNK_SIZE) -> HashResult:
+    """SHA-256 certificate ID of a binary file-like object (file, UploadedFile, mmap...).
+
+    Reads from the current position in fixed-size chunks into one reused
+    buffer, so memory stays constant regardless of file size.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    start = time.perf_counter()
+    if hasattr(stream, "readinto"):
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        while True:
+            read = stream.readinto(buffer)
+            if not read:
+                break
+            sha256.update(view[:read])
+            size += read
+    else:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            size += len(chunk)
+    seconds = time.perf_counter() - start
+    observe("sha256", seconds)
+    inc("sha256_bytes", size)
+    return HashResult(sha256.hexdigest(), size, seconds)
+
+
 def generate_certificate_id(pdf_path: str) -> str:
     """Generate a SHA-256 hash of the PDF content as certificate ID."""
     with open(pdf_path, "rb") as f:
-        file_bytes = f.read()
-    return hashlib.sha256(file_bytes).hexdigest()
+        return hash_stream(f).certificate_id
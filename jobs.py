@@ -0,0 +1,365 @@
+"""Persistent job queue and the worker processes that run issuance jobs.
+
+The Streamlit app only enqueues: each job is a row in a local SQLite file
+describing what to issue, and ``python jobs.py --workers N`` claims queued
+jobs, renders, pins and issues them, and writes progress back to the same
+row for the Jobs page. Workers are started and scaled independently of the
+app. A job whose worker dies is requeued once its heartbeat goes stale.
+"""
+import os
+import json
+import time
+import signal
+import socket
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from contextlib import closing
+from dotenv import load_dotenv
+from ipfs import render_certificate_with_id, save_certificate, UploadQueue, PinIndex
+from cid import compute_cid
+from storage import get_storage
+from pdfcache import PdfCache
+from blockchain import load_contract, issue_call, verify_certificate
+from txmanager import TransactionManager, CONFIRMED
+from batch import BatchIssuer, load_roster, summarize, LOGO_PATH, FAILED as ROW_FAILED
+from metrics import inc, observe, gauge
+
+JOB_DB_PATH = "jobs.db"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+ISSUE_JOB, BATCH_JOB = "issue", "batch"
+
+HEARTBEAT_INTERVAL = 5.0
+STALE_AFTER = 60.0
+MAX_ATTEMPTS = 3
+PROGRESS_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    pid INTEGER,
+    sender TEXT,
+    job_id INTEGER,
+    heartbeat REAL NOT NULL
+);
+"""
+
+JSON_COLUMNS = ("payload", "progress", "result")
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    for column in JSON_COLUMNS:
+        job[column] = json.loads(job[column]) if job[column] else None
+    return job
+
+
+class JobQueue:
+    """SQLite-backed queue shared by the app (producer) and the worker processes (consumers).
+
+    A job is claimed with a single UPDATE ... RETURNING, so two workers
+    never take the same one. Running jobs carry a heartbeat; one that has
+    not been refreshed for ``stale_after`` seconds is handed to the next
+    worker, up to MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, path: str = None, stale_after: float = STALE_AFTER):
+        self.path = path or os.getenv("JOB_DB", JOB_DB_PATH)
+        self.stale_after = stale_after
+        with closing(self._connect()) as conn:
+            # WAL lets the app read progress while workers are writing it.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        gauge("jobs_queued", lambda: self.count(QUEUED))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def submit(self, kind: str, payload: dict) -> int:
+        """Queues a job and returns its ID."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, payload, status, created_at) VALUES (?, ?, ?, ?)",
+                (kind, json.dumps(payload), QUEUED, time.time()),
+            )
+        inc("jobs_submitted", kind=kind)
+        return cursor.lastrowid
+
+    def claim(self, worker: str):
+        """Marks the oldest queued job as running on ``worker`` and returns it, or None."""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            # Taking the write lock before the SELECT keeps two workers from picking the same job
+            # (and avoids UPDATE ... RETURNING, which needs SQLite 3.35+).
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_stale(conn, now)
+            row = conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, heartbeat = ?, "
+                "error = NULL WHERE id = ?",
+                (RUNNING, worker, now, now, row["id"]),
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return _decode(row)
+
+    def _requeue_stale(self, conn: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.stale_after
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+            "WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+            (FAILED, "Worker stopped responding", now, RUNNING, cutoff, MAX_ATTEMPTS),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ?",
+            (QUEUED, RUNNING, cutoff),
+        )
+
+    def heartbeat(self, job_id: int, progress: dict = None) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat = ?, progress = COALESCE(?, progress) WHERE id = ? AND status = ?",
+                (time.time(), json.dumps(progress) if progress is not None else None, job_id, RUNNING),
+            )
+
+    def finish(self, job_id: int, result: dict) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (DONE, json.dumps(result), time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def retry(self, job_id: int) -> bool:
+        """Requeues a failed job; returns False if it was not failed."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, worker = NULL, finished_at = NULL "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, job_id, FAILED),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: int):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _decode(row) if row else None
+
+    def recent(self, limit: int = 50) -> list:
+        with closing(self._connect()) as conn:
+            return [_decode(row) for row in conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))]
+
+    def count(self, status: str) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def beat(self, worker: str, sender: str, job_id: int = None) -> None:
+        """Records that ``worker`` is alive (and what it is running)."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (name, pid, sender, job_id, heartbeat) VALUES (?, ?, ?, ?, ?)",
+                (worker, os.getpid(), sender, job_id, time.time()),
+            )
+
+    def leave(self, worker: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM workers WHERE name = ?", (worker,))
+
+    def workers(self) -> list:
+        """Workers that have checked in within ``stale_after`` seconds."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT * FROM workers WHERE heartbeat >= ? ORDER BY name", (time.time() - self.stale_after,)
+            )
+            return [dict(row) for row in rows]
+
+
+class JobWorker:
+    """Runs jobs one at a time in this process.
+
+    Each worker has its own sender account, so its TransactionManager's
+    local nonce counter never races another process's.
+    """
+
+    def __init__(self, queue: JobQueue, contract, sender: str, poll_interval: float = 0.5):
+        self.queue = queue
+        self.contract = contract
+        self.sender = sender
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.tx_manager = TransactionManager(contract.w3, sender).start()
+        storage = get_storage()
+        self.uploader = UploadQueue(upload=storage.add, index=PinIndex(backend=storage.name))
+        self.pdf_cache = PdfCache(storage.get)
+        self._job_id = None
+        self._last_report = 0.0
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        """Lets the current job finish, then exits ``run``."""
+        self._stopping.set()
+
+    def run(self) -> None:
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        print(f"👷 Worker {self.name} sending from {self.sender}")
+        try:
+            while not self._stopping.is_set():
+                job = self.queue.claim(self.name)
+                if job is None:
+                    self._stopping.wait(self.poll_interval)
+                    continue
+                self._run_job(job)
+        finally:
+            self.queue.leave(self.name)
+            self.uploader.shutdown(wait=True)
+            self.tx_manager.stop()
+
+    def _heartbeat_loop(self) -> None:
+        while True:
+            job_id = self._job_id
+            self.queue.beat(self.name, self.sender, job_id)
+            if job_id is not None:
+                self.queue.heartbeat(job_id)
+            if self._stopping.wait(HEARTBEAT_INTERVAL):
+                return
+
+    def _run_job(self, job: dict) -> None:
+        self._job_id = job["id"]
+        self.queue.beat(self.name, self.sender, job["id"])
+        print(f"▶️ Job {job['id']} ({job['kind']}), attempt {job['attempts']}")
+        start = time.perf_counter()
+        try:
+            handler = {ISSUE_JOB: self.issue, BATCH_JOB: self.issue_batch}[job["kind"]]
+            result = handler(job["payload"])
+        except Exception as e:
+            self.queue.fail(job["id"], str(e))
+            inc("jobs", kind=job["kind"], status=FAILED)
+            print(f"❌ Job {job['id']} failed: {e}")
+        else:
+            self.queue.finish(job["id"], result)
+            inc("jobs", kind=job["kind"], status=DONE)
+            print(f"✅ Job {job['id']} done")
+        finally:
+            observe("job", time.perf_counter() - start, kind=job["kind"])
+            self._job_id = None
+
+    def _report(self, progress: dict) -> None:
+        self._last_report = time.monotonic()
+        self.queue.heartbeat(self._job_id, progress)
+
+    def issue(self, payload: dict) -> dict:
+        """Renders, pins and issues one certificate; safe to rerun after an interruption."""
+        self._report({"stage": "rendering"})
+        pdf_bytes, cert_id = render_certificate_with_id(payload["uid"], payload["name"], payload["course"], LOGO_PATH)
+        save_certificate(cert_id, pdf_bytes)
+        cid = compute_cid(pdf_bytes)
+        result = {"cert_id": cert_id, "cid": cid}
+        self.pdf_cache.put(cid, pdf_bytes)
+
+        # Rendering is deterministic, so a rerun finds its own earlier issuance here;
+        # the pin still goes through (the pin index skips it if already done).
+        upload = self.uploader.submit(pdf_bytes, f"{cert_id}.pdf", cid)
+        already_issued = verify_certificate(self.contract, cert_id)["exists"]
+        if not already_issued:
+            call = issue_call(self.contract, cert_id, cid, payload["uid"], payload["name"],
+                              payload["course"], payload["org"])
+            tx_id = self.tx_manager.submit(call, label=cert_id)
+
+        self._report({"stage": "pinning", **result})
+        upload.result()
+        if already_issued:
+            return {**result, "already_issued": True}
+
+        self._report({"stage": "confirming", **result})
+        tx = self.tx_manager.wait([tx_id])[0]
+        if tx["status"] != CONFIRMED:
+            raise RuntimeError(f"Transaction {tx['status']}: {tx['error']}")
+        return {**result, "tx_hash": tx["tx_hash"], "block": tx["block"]}
+
+    def issue_batch(self, payload: dict) -> dict:
+        """Runs a roster through BatchIssuer; a retried job resumes from its status file."""
+        roster = load_roster(payload["roster_path"])
+
+        def on_update(key, entry):
+            # Row updates arrive from pipeline threads far more often than the UI polls.
+            if time.monotonic() - self._last_report >= PROGRESS_INTERVAL:
+                self._report({"rows": len(roster), **summarize(issuer.status)})
+
+        issuer = BatchIssuer(payload["status_path"], contract=self.contract, tx_manager=self.tx_manager,
+                             uploader=self.uploader, merkle=payload.get("merkle", False), on_update=on_update)
+        counts = summarize(issuer.run(roster))
+        self._report({"rows": len(roster), **counts})
+        if counts.get(ROW_FAILED):
+            raise RuntimeError(f"{counts[ROW_FAILED]} of {len(roster)} rows failed; retry the job to resume them")
+        return {"rows": len(roster), **counts}
+
+
+def run_worker(path: str, account_index: int) -> None:
+    """Process entry point: one JobWorker sending from the node's ``account_index``-th account."""
+    load_dotenv()
+    w3, contract = load_contract()
+    worker = JobWorker(JobQueue(path), contract, w3.eth.accounts[account_index])
+    # Ctrl+C and SIGTERM finish the current job first; a killed worker's job is requeued later.
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    worker.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run issuance job workers.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--db", default=None, help="Job database (default: JOB_DB or jobs.db)")
+    parser.add_argument("--first-account", type=int, default=1,
+                        help="Worker i sends from node account first+i; account 0 stays with the app")
+    args = parser.parse_args()
+
+    load_dotenv()
+    queue = JobQueue(args.db)
+    accounts = load_contract()[0].eth.accounts
+    if args.first_account + args.workers > len(accounts):
+        parser.error(f"{args.workers} workers from account {args.first_account} need more than "
+                     f"the node's {len(accounts)} accounts")
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(queue.path, args.first_account + i), name=f"worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    # launch.py stops workers with SIGTERM; pass it on so each finishes its current job.
+    signal.signal(signal.SIGTERM, lambda *_: [process.terminate() for process in processes])
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("⛔ Waiting for workers to finish their current jobs...")
+        for process in processes:
+            process.join()
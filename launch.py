@@ -4,8 +4,11 @@ import os
 import platform
 import re
 import sys
+import json
+import hashlib
 import requests
 import argparse
+from blockchain import get_web3, deploy_contract
 
 # Windows-specific check
 def check_and_install_pywin32():
@@ -33,21 +36,24 @@ ENV_FILE = ".env"
 GANACHE_PORT = 8545
 MIGRATION_FLAG = ".migrated"
 GANACHE_DB_DIR = os.path.join(PROJECT_DIR, "ganache_db")
+CONTRACT_SOURCE = os.path.join("contracts", "CertificateRegistry.sol")
+CONTRACT_ARTIFACT = os.path.join("build", "contracts", "CertificateRegistry.json")
 
 # Process handles
 ganache_process = None
 streamlit_process = None
+worker_process = None
 
-def open_ganache_process():
+def open_ganache_process(port=GANACHE_PORT, db_dir=GANACHE_DB_DIR):
     global ganache_process
     print("🚀 Launching Ganache with persistent state...")
 
-    if not os.path.exists(GANACHE_DB_DIR):
-        os.makedirs(GANACHE_DB_DIR)
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
 
     if platform.system() == "Windows":
         ganache_process = subprocess.Popen(
-            ['ganache', '--port', str(GANACHE_PORT), '--db', GANACHE_DB_DIR , '--deterministic'],
+            ['ganache', '--port', str(port), '--db', db_dir, '--deterministic'],
             creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
@@ -55,29 +61,77 @@ def open_ganache_process():
         )
     else:
         ganache_process = subprocess.Popen(
-            ['ganache', '--port', str(GANACHE_PORT), '--db', GANACHE_DB_DIR , '--deterministic'],
+            ['ganache', '--port', str(port), '--db', db_dir, '--deterministic'],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL
         )
 
-def wait_for_ganache(timeout=60):
-    print("⏳ Waiting for Ganache to be ready on port 8545...")
+def wait_for_ganache(timeout=60, port=GANACHE_PORT):
+    print(f"⏳ Waiting for Ganache to be ready on port {port}...")
     start_time = time.time()
+    delay = 0.05
     while True:
         try:
-            response = requests.post("http://127.0.0.1:8545", json={
+            response = requests.post(f"http://127.0.0.1:{port}", json={
                 "jsonrpc": "2.0", "method": "web3_clientVersion", "params": [], "id": 1
-            }, timeout=2)
+            }, timeout=1)
             if response.status_code == 200:
-                print("🟢 Ganache is up and responding.")
+                print(f"🟢 Ganache is up and responding ({time.time() - start_time:.1f}s).")
                 break
-        except Exception:
+        except requests.RequestException:
             pass
+        if ganache_process and ganache_process.poll() is not None:
+            print("❌ Ganache exited before it was ready.")
+            terminate_processes()
+            sys.exit(1)
         if time.time() - start_time > timeout:
             print("❌ Ganache did not start within time limit.")
             terminate_processes()
             sys.exit(1)
-        time.sleep(1)
+        # Short, growing pauses: a warm start answers within a few hundred milliseconds.
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+def source_hash(path=CONTRACT_SOURCE):
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def artifact_is_current(artifact_path=CONTRACT_ARTIFACT, source_path=CONTRACT_SOURCE):
+    """True when the Truffle artifact was compiled from the current contract source."""
+    if not os.path.exists(artifact_path):
+        return False
+    with open(artifact_path, encoding="utf-8") as file:
+        compiled_source = json.load(file).get("source", "")
+    return hashlib.sha256(compiled_source.encode("utf-8")).hexdigest() == source_hash(source_path)
+
+def read_env_address(env_path=ENV_FILE):
+    if not os.path.exists(env_path):
+        return None
+    with open(env_path, "r") as file:
+        for line in file:
+            if line.startswith("CONTRACT_ADDRESS="):
+                return line.split("=", 1)[1].strip().strip('"') or None
+    return None
+
+def is_deployed(w3, address):
+    """The migration flag matches the current source and the chain still has code at the address."""
+    if not address or not os.path.exists(MIGRATION_FLAG):
+        return False
+    with open(MIGRATION_FLAG, "r") as flag_file:
+        if flag_file.read().strip() != source_hash():
+            return False
+    return len(w3.eth.get_code(w3.to_checksum_address(address))) > 0
+
+def deploy_native(w3):
+    """Compiles only if the source changed, then deploys straight through web3."""
+    if artifact_is_current():
+        print("📌 Compiled artifact matches the contract source. Skipping compile.")
+    else:
+        run_truffle_compile()
+    print("📦 Deploying CertificateRegistry...")
+    address = deploy_contract(w3, json_path=CONTRACT_ARTIFACT)
+    print(f"✅ Deployed at {address}.")
+    return address
 
 def run_truffle_compile():
     print("🛠️ Compiling contracts...")
@@ -135,6 +189,14 @@ def update_env_file(address, env_path=".env"):
         file.writelines(updated_lines)
     print(f"📄 .env updated with contract address: {address}")
 
+def run_workers(count):
+    global worker_process
+    print(f"👷 Starting {count} job worker(s)...")
+    worker_process = subprocess.Popen(
+        [sys.executable, "jobs.py", "--workers", str(count)],
+        cwd=PROJECT_DIR
+    )
+
 def run_streamlit():
     global streamlit_process
     print("🚀 Launching Streamlit app...")
@@ -149,6 +211,14 @@ def run_streamlit():
 
 def terminate_processes():
     print("🛑 Cleaning up processes...")
+    if worker_process:
+        try:
+            # Workers finish the job they are on before exiting.
+            worker_process.terminate()
+            worker_process.wait(timeout=30)
+            print("✅ Job workers terminated.")
+        except Exception as e:
+            print(f"❌ Error terminating job workers: {e}")
     if streamlit_process:
         try:
             streamlit_process.terminate()
@@ -171,6 +241,8 @@ def terminate_processes():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--reset", action="store_true", help="Force recompile and remigrate contracts and reset blockchain state")
+    parser.add_argument("--truffle", action="store_true", help="Compile and migrate with the Truffle CLI instead of deploying through web3")
+    parser.add_argument("--workers", type=int, default=1, help="Job worker processes to start (0 to run them separately)")
     args = parser.parse_args()
 
     try:
@@ -194,23 +266,31 @@ if __name__ == "__main__":
         open_ganache_process()
         wait_for_ganache()
 
-        if not os.path.exists(MIGRATION_FLAG):
+        if args.truffle:
             run_truffle_compile()
             run_truffle_migrate()
-
             contract_address = extract_contract_address(OUTPUT_FILE)
-            if contract_address:
-                update_env_file(contract_address)
-                with open(MIGRATION_FLAG, "w") as flag_file:
-                    flag_file.write("Migration complete.\n")
-                print("✅ Migration flag created.")
-            else:
+            if not contract_address:
                 print("❌ Contract address not found in migration logs.")
                 terminate_processes()
                 sys.exit(1)
         else:
-            print("📌 Migration already done. Skipping compile and migrate.")
+            w3 = get_web3(f"http://127.0.0.1:{GANACHE_PORT}")
+            contract_address = read_env_address()
+            if is_deployed(w3, contract_address):
+                print(f"📌 Contract already deployed at {contract_address}. Skipping compile and deploy.")
+                contract_address = None
+            else:
+                contract_address = deploy_native(w3)
+
+        if contract_address:
+            update_env_file(contract_address)
+            with open(MIGRATION_FLAG, "w") as flag_file:
+                flag_file.write(source_hash() + "\n")
+            print("✅ Migration flag created.")
 
+        if args.workers:
+            run_workers(args.workers)
         run_streamlit()
 
     except KeyboardInterrupt:
@@ -0,0 +1,152 @@
+"""Merkle trees over certificate leaves, for anchoring a whole batch under one on-chain root.
+
+Leaves and inner nodes are SHA-256 hashes with distinct one-byte prefixes,
+so a leaf can never be passed off as an inner node. Sibling pairs are
+sorted before hashing, so a proof is just the list of sibling hashes (no
+left/right flags), and an unpaired node is promoted to the next level
+as-is rather than duplicated.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+from contextlib import closing
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+PROOF_DB_PATH = "proofs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proofs (
+    cert_id TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    leaf_index INTEGER NOT NULL,
+    proof BLOB NOT NULL,
+    cid TEXT,
+    uid TEXT,
+    name TEXT,
+    course TEXT,
+    org TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_proofs_root ON proofs (root);
+CREATE TABLE IF NOT EXISTS roots (
+    root TEXT PRIMARY KEY,
+    leaf_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+RECORD_FIELDS = ("cid", "uid", "name", "course", "org")
+
+
+def hash_leaf(data: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    if right < left:
+        left, right = right, left
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleTree:
+    """All levels of the tree over ``leaves`` (already hashed with hash_leaf), leaves first."""
+
+    def __init__(self, leaves: list):
+        if not leaves:
+            raise ValueError("A Merkle tree needs at least one leaf")
+        self.levels = [list(leaves)]
+        level = self.levels[0]
+        while len(level) > 1:
+            parents = [hash_node(left, right) for left, right in zip(level[0::2], level[1::2])]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+            level = parents
+
+    @property
+    def root(self) -> bytes:
+        return self.levels[-1][0]
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def proof(self, index: int) -> list:
+        """Sibling hashes from the leaf at ``index`` up to the root."""
+        proof = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(level[sibling])
+            index //= 2
+        return proof
+
+
+def compute_root(leaf: bytes, proof: list) -> bytes:
+    node = leaf
+    for sibling in proof:
+        node = hash_node(node, sibling)
+    return node
+
+
+def verify_proof(leaf: bytes, proof: list, root: bytes) -> bool:
+    return compute_root(leaf, proof) == root
+
+
+class ProofStore:
+    """SQLite store of inclusion proofs plus the certificate details each leaf commits to.
+
+    Only the root is on-chain, so this file (or a copy of it) is what lets a
+    verifier find the proof for a certificate ID.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or proof_store_path()
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.executescript(SCHEMA)
+
+    def add(self, tree: MerkleTree, records: list) -> None:
+        """Stores one proof per record; ``records[i]`` is the certificate behind leaf ``i``."""
+        root = tree.root.hex()
+        rows = [
+            (record["cert_id"], root, index, b"".join(tree.proof(index)),
+             *(record[field] for field in RECORD_FIELDS))
+            for index, record in enumerate(records)
+        ]
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO roots VALUES (?, ?, ?)", (root, len(tree), time.time()))
+            conn.executemany("INSERT OR REPLACE INTO proofs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get_many(self, cert_ids: list) -> dict:
+        """Maps each stored certificate ID to its record, root and decoded proof."""
+        found = {}
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            for start in range(0, len(cert_ids), 500):
+                chunk = cert_ids[start:start + 500]
+                query = f"SELECT * FROM proofs WHERE cert_id IN ({', '.join('?' * len(chunk))})"
+                for row in conn.execute(query, chunk):
+                    record = dict(row)
+                    proof = record["proof"]
+                    record["proof"] = [proof[i:i + 32] for i in range(0, len(proof), 32)]
+                    found[record["cert_id"]] = record
+        return found
+
+    def get(self, cert_id: str):
+        return self.get_many([cert_id]).get(cert_id)
+
+    def cert_ids(self, root: str) -> list:
+        """Every certificate ID anchored under ``root`` (hex)."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            return [row[0] for row in conn.execute("SELECT cert_id FROM proofs WHERE root = ?", (root,))]
+
+
+def proof_store_path() -> str:
+    """Where proofs are written and looked up: PROOF_DB, or proofs.db."""
+    return os.getenv("PROOF_DB", PROOF_DB_PATH)
+
+
+def open_proof_store(path: str = None):
+    """The proof store at ``path`` (default: proof_store_path()), or None if there is none yet."""
+    path = path or proof_store_path()
+    return ProofStore(path) if os.path.exists(path) else None
@@ -0,0 +1,149 @@
+"""Process-wide counters, latency histograms and gauges with a Prometheus text export.
+
+    with timed("ipfs_upload", backend="pinata"):
+        ...
+
+records ``ipfs_upload_seconds`` (a histogram) and, if the block raises,
+``errors_total{stage="ipfs_upload"}``. Set METRICS_LOG to a file path (or
+``-`` for stdout) to also get one JSON line per timed event.
+"""
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PORT = 9108
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+_log_file = None
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    """Adds to the counter ``name``; exported with a ``_total`` suffix."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Records one duration in the ``<name>_seconds`` histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0}
+        index = bisect.bisect_left(BUCKETS, seconds)
+        if index < len(BUCKETS):
+            histogram["buckets"][index] += 1
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+
+
+def gauge(name: str, read, **labels) -> None:
+    """Registers a callable sampled at export time (e.g. a cache's hit ratio)."""
+    with _lock:
+        _gauges[_key(name, labels)] = read
+
+
+@contextmanager
+def timed(stage: str, **labels):
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        inc("errors", stage=stage, error=type(e).__name__)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        observe(stage, seconds, **labels)
+        log_event(stage, seconds=round(seconds, 6), ok=error is None,
+                  error=str(error) if error else None, **labels)
+
+
+def log_event(event: str, **fields) -> None:
+    """Writes one structured JSON line when METRICS_LOG is set."""
+    global _log_file
+    target = os.getenv("METRICS_LOG")
+    if not target:
+        return
+    line = json.dumps({"ts": time.time(), "event": event, "pid": os.getpid(), **fields}, default=str)
+    with _lock:
+        if _log_file is None:
+            _log_file = sys.stdout if target == "-" else open(target, "a", encoding="utf-8", buffering=1)
+        _log_file.write(line + "\n")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple, extra: dict = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {**value, "buckets": list(value["buckets"])} for key, value in _histograms.items()}
+        gauges = dict(_gauges)
+
+    lines = []
+    for (name, labels), value in sorted(counters.items(), key=str):
+        lines.append(f"{name}_total{_labels(labels)} {value}")
+    for (name, labels), histogram in sorted(histograms.items(), key=str):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram["buckets"]):
+            cumulative += count
+            lines.append(f"{name}_seconds_bucket{_labels(labels, {'le': bound})} {cumulative}")
+        lines.append(f"{name}_seconds_bucket{_labels(labels, {'le': '+Inf'})} {histogram['count']}")
+        lines.append(f"{name}_seconds_sum{_labels(labels)} {histogram['sum']:.6f}")
+        lines.append(f"{name}_seconds_count{_labels(labels)} {histogram['count']}")
+    for (name, labels), read in sorted(gauges.items(), key=str):
+        try:
+            lines.append(f"{name}{_labels(labels)} {float(read())}")
+        except Exception:
+            continue
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int = None, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves /metrics from a background thread (for processes without their own HTTP server)."""
+    port = port or int(os.getenv("METRICS_PORT", METRICS_PORT))
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,124 @@
+import os
+import threading
+from cid import compute_cid
+from metrics import inc, gauge
+
+try:
+    import fitz  # PyMuPDF, optional: only needed for PNG previews
+except ImportError:
+    fitz = None
+
+PDF_CACHE_DIR = "pdf_cache"
+PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+THUMBNAIL_WIDTH = 800
+
+
+class PdfCache:
+    """On-disk cache of certificate PDFs keyed by CID, bounded by total size.
+
+    Fetched bytes are only stored after their CID is recomputed and matches,
+    so a misbehaving gateway can never poison the cache. The least recently
+    used files are evicted once ``max_bytes`` is exceeded; rendered PNG
+    previews live next to their PDF and count towards the same budget.
+
+    Recency is the file's mtime (refreshed on every hit) and the budget is
+    worked out from the directory on each write, so processes sharing
+    ``root`` (the app and the job workers) stay within one limit together.
+    """
+
+    def __init__(self, fetch, root: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.fetch = fetch
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._scan())
+        gauge("pdf_cache_bytes", lambda: self.size)
+        gauge("cache_hit_ratio", lambda: self.hits / ((self.hits + self.misses) or 1), cache="pdf")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _scan(self) -> list:
+        """(name, size, mtime) of every cached file, including other processes' writes."""
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((entry.name, stat.st_size, stat.st_mtime))
+        return files
+
+    def _read(self, name: str):
+        path = self._path(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Mark it recently used for every process sharing the directory.
+            os.utime(path)
+        except FileNotFoundError:
+            # Not cached, or evicted by another process sharing the directory.
+            return None
+        return data
+
+    def _write(self, name: str, data: bytes) -> None:
+        temp_path = f"{self._path(name)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self._path(name))
+        with self._lock:
+            files = sorted(self._scan(), key=lambda file: file[2])
+            self.size = sum(size for _, size, _ in files)
+            for oldest, size, _ in files:
+                if self.size <= self.max_bytes:
+                    break
+                if oldest == name:
+                    continue
+                try:
+                    os.remove(self._path(oldest))
+                except FileNotFoundError:
+                    pass
+                self.size -= size
+
+    def put(self, cid: str, data: bytes) -> None:
+        """Stores bytes for ``cid`` after checking they hash to it."""
+        version = 0 if cid.startswith("Qm") else 1
+        if compute_cid(data, version) != cid:
+            raise ValueError(f"Content does not match CID {cid}")
+        self._write(f"{cid}.pdf", data)
+
+    def get(self, cid: str) -> bytes:
+        data = self._read(f"{cid}.pdf")
+        if data is not None:
+            self.hits += 1
+            inc("cache_requests", cache="pdf", result="hit")
+            return data
+        self.misses += 1
+        inc("cache_requests", cache="pdf", result="miss")
+        data = self.fetch(cid)
+        self.put(cid, data)
+        return data
+
+    def thumbnail(self, cid: str, width: int = THUMBNAIL_WIDTH):
+        """PNG of the first page, rendered once and cached; None without PyMuPDF."""
+        if fitz is None:
+            return None
+        name = f"{cid}.{width}.png"
+        png = self._read(name)
+        if png is None:
+            with fitz.open(stream=self.get(cid), filetype="pdf") as doc:
+                page = doc[0]
+                zoom = width / page.rect.width
+                png = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+            self._write(name, png)
+        return png
+
+    def stats(self) -> dict:
+        files = self._scan()
+        return {"files": len(files), "bytes": sum(size for _, size, _ in files),
+                "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,137 @@
+"""Local set of revoked certificate IDs, synced from the registry's revoke events.
+
+Verification marks results revoked from this set, so a revocation shows up
+within one event sync without re-reading the record from the chain. The
+set is kept in SQLite and loaded into memory, so restarts only fetch new
+blocks. Run as a script, it revokes the IDs in a file in bulk.
+"""
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import closing
+from dotenv import load_dotenv
+from bloom import normalize_id
+from blockchain import (
+    load_contract, verify_certificates, revoke_calls, fetch_registry_events, event_certificate_id, REVOKE_EVENTS,
+)
+from txmanager import TransactionManager, CONFIRMED
+from metrics import gauge
+
+REVOCATION_DB_PATH = "revocations.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revoked (
+    cert_id TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class RevocationSet:
+    """Revoked IDs of one deployment, persisted to ``path`` and held in memory for lookups."""
+
+    def __init__(self, contract, path: str = REVOCATION_DB_PATH, block_batch: int = 2000):
+        self.contract = contract
+        self.path = path
+        self.block_batch = block_batch
+        self._lock = threading.Lock()
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            conn.executescript(SCHEMA)
+            state = dict(conn.execute("SELECT key, value FROM sync_state"))
+            if state.get("contract") != contract.address:
+                # Revocations recorded for another deployment do not apply to this one.
+                conn.execute("DELETE FROM revoked")
+                conn.execute("DELETE FROM sync_state")
+                conn.execute("INSERT INTO sync_state VALUES ('contract', ?)", (contract.address,))
+                state = {}
+            self._ids = {row[0] for row in conn.execute("SELECT cert_id FROM revoked")}
+        self.last_block = int(state.get("last_block", -1))
+        gauge("revoked_ids", lambda: len(self._ids))
+
+    def sync(self, to_block: int = None) -> int:
+        """Records revocations up to ``to_block`` (default: latest); returns how many were new."""
+        with self._lock:
+            if to_block is None:
+                to_block = self.contract.w3.eth.block_number
+            added = 0
+            for start in range(self.last_block + 1, to_block + 1, self.block_batch):
+                end = min(start + self.block_batch - 1, to_block)
+                rows = [
+                    (normalize_id(event_certificate_id(event)), event["blockNumber"])
+                    for event in fetch_registry_events(self.contract, start, end, names=REVOKE_EVENTS)
+                ]
+                with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+                    conn.executemany("INSERT OR IGNORE INTO revoked VALUES (?, ?)", rows)
+                    conn.execute("INSERT OR REPLACE INTO sync_state VALUES ('last_block', ?)", (str(end),))
+                new = {cert_id for cert_id, _ in rows} - self._ids
+                self._ids |= new
+                added += len(new)
+                self.last_block = end
+            return added
+
+    def __contains__(self, cert_id: str) -> bool:
+        return normalize_id(cert_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def revocation_set(contract):
+    """RevocationSet for the verification paths (REVOCATION_DB to move its file)."""
+    return RevocationSet(contract, os.getenv("REVOCATION_DB", REVOCATION_DB_PATH))
+
+
+def plan_revocation(certs: list) -> dict:
+    """Splits verification results into what to revoke, what is already revoked and what does not exist."""
+    plan = {"revoke": [], "revoked": [], "missing": []}
+    for cert in certs:
+        if not cert["exists"]:
+            plan["missing"].append(cert)
+        elif cert["revoked"]:
+            plan["revoked"].append(cert)
+        else:
+            plan["revoke"].append(cert)
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revoke certificates in bulk and sync the local revocation set.")
+    parser.add_argument("ids", nargs="?", help="File with one certificate ID per line; omit to only sync")
+    parser.add_argument("--db", default=REVOCATION_DB_PATH)
+    parser.add_argument("--account", type=int, default=0,
+                        help="Node account index to send from; it must be the contract owner (account 0 by default) "
+                             "or the certificates' issuer")
+    args = parser.parse_args()
+
+    load_dotenv()
+    w3, contract = load_contract()
+    revocations = RevocationSet(contract, args.db)
+
+    if args.ids:
+        with open(args.ids, encoding="utf-8") as f:
+            cert_ids = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        plan = plan_revocation(verify_certificates(contract, cert_ids))
+        print(f"🔎 {len(plan['revoke'])} to revoke, {len(plan['revoked'])} already revoked, "
+              f"{len(plan['missing'])} not found")
+        if plan["revoke"]:
+            # The contract owner (the node's first account by default) may revoke any certificate. If the app
+            # sends from the same account, nonce conflicts are resolved by resyncing from the node.
+            tx_manager = TransactionManager(w3, w3.eth.accounts[args.account]).start()
+            start = time.perf_counter()
+            tx_ids = [tx_manager.submit(call, label="revoke") for call in revoke_calls(contract, plan["revoke"])]
+            txs = tx_manager.wait(tx_ids)
+            tx_manager.stop()
+            failed = [tx for tx in txs if tx["status"] != CONFIRMED]
+            for tx in failed:
+                print(f"❌ Transaction {tx['status']}: {tx['error']}")
+            print(f"✅ {len(txs) - len(failed)} of {len(txs)} revocation transactions confirmed "
+                  f"in {time.perf_counter() - start:.1f}s")
+
+    added = revocations.sync()
+    print(f"✅ {added} new revocations; {len(revocations)} revoked in total")
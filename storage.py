@@ -0,0 +1,104 @@
+import os
+from functools import lru_cache
+from ipfs import upload_bytes_to_pinata, post_file, fetch_bytes
+from cid import compute_cid
+
+PINATA_GATEWAY_URL = "https://gateway.pinata.cloud/ipfs/"
+KUBO_API_URL = "http://127.0.0.1:5001"
+KUBO_GATEWAY_URL = "http://127.0.0.1:8080/ipfs/"
+STORE_DIR = "ipfs_store"
+
+
+class StorageBackend:
+    """Where certificate PDFs live: ``add`` returns the CID, ``get`` returns the bytes back."""
+
+    name = None
+
+    def __init__(self, gateway_url: str = None):
+        self.gateway = gateway_url
+
+    def add(self, data: bytes, filename: str) -> str:
+        raise NotImplementedError
+
+    def get(self, cid: str) -> bytes:
+        raise NotImplementedError
+
+    def gateway_url(self, cid: str):
+        """Public URL for the CID, or None when the store is not reachable over HTTP."""
+        return f"{self.gateway.rstrip('/')}/{cid}" if self.gateway else None
+
+
+class PinataStorage(StorageBackend):
+    name = "pinata"
+
+    def __init__(self, gateway_url: str = None):
+        super().__init__(gateway_url or os.getenv("IPFS_GATEWAY_URL", PINATA_GATEWAY_URL))
+
+    def add(self, data: bytes, filename: str) -> str:
+        return upload_bytes_to_pinata(data, filename)
+
+    def get(self, cid: str) -> bytes:
+        return fetch_bytes(self.gateway_url(cid))
+
+
+class KuboStorage(StorageBackend):
+    """A local IPFS node (or anything serving Kubo's /api/v0/add and /api/v0/cat)."""
+
+    name = "kubo"
+
+    def __init__(self, api_url: str = None, gateway_url: str = None):
+        super().__init__(gateway_url or os.getenv("IPFS_GATEWAY_URL", KUBO_GATEWAY_URL))
+        self.api_url = (api_url or os.getenv("IPFS_API_URL", KUBO_API_URL)).rstrip("/")
+
+    def add(self, data: bytes, filename: str) -> str:
+        result = post_file(f"{self.api_url}/api/v0/add", data, filename,
+                           params={"cid-version": 0, "pin": "true"})
+        return result["Hash"]
+
+    def get(self, cid: str) -> bytes:
+        return fetch_bytes(f"{self.api_url}/api/v0/cat", method="POST", params={"arg": cid})
+
+
+class FilesystemStorage(StorageBackend):
+    """Content-addressed files on local disk, named by the CID IPFS would give them.
+
+    No daemon and no network, so the issue/verify pipeline can be load-tested
+    offline; CIDs are identical to what Pinata or Kubo would return.
+    """
+
+    name = "filesystem"
+
+    def __init__(self, root: str = None, gateway_url: str = None):
+        super().__init__(gateway_url or os.getenv("IPFS_GATEWAY_URL"))
+        self.root = root or os.getenv("IPFS_STORE_DIR", STORE_DIR)
+
+    def path(self, cid: str) -> str:
+        # Shard on the last two characters so no directory grows unbounded.
+        return os.path.join(self.root, cid[-2:], cid)
+
+    def add(self, data: bytes, filename: str) -> str:
+        cid = compute_cid(data)
+        path = self.path(cid)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return cid
+
+    def get(self, cid: str) -> bytes:
+        with open(self.path(cid), "rb") as f:
+            return f.read()
+
+
+BACKENDS = {backend.name: backend for backend in (PinataStorage, KuboStorage, FilesystemStorage)}
+
+
+@lru_cache(maxsize=None)
+def get_storage(name: str = None) -> StorageBackend:
+    """Backend named by ``name`` or the STORAGE_BACKEND env var (default: pinata)."""
+    name = name or os.getenv("STORAGE_BACKEND", PinataStorage.name)
+    if name not in BACKENDS:
+        raise EnvironmentError(f"Unknown STORAGE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,55 @@
+import asyncio
+import hashlib
+
+from aiohttp import FormData
+from aiohttp.test_utils import TestClient, TestServer
+
+import api
+
+
+class FakeVerifier:
+    def verify_many(self, cert_ids):
+        return [{"cert_id": cert_id, "exists": False, "revoked": False} for cert_id in cert_ids]
+
+
+def post_batch(monkeypatch, files: list):
+    hashed = []
+    hash_body = api._hash_body
+
+    async def counting_hash_body(body):
+        hashed.append(body)
+        return await hash_body(body)
+
+    monkeypatch.setattr(api, "_hash_body", counting_hash_body)
+    monkeypatch.setattr(api, "CachedVerifier", lambda contract, **kwargs: FakeVerifier())
+    monkeypatch.setattr(api, "issued_id_filter", lambda contract: None)
+    monkeypatch.setattr(api, "revocation_set", lambda contract: None)
+
+    async def post():
+        form = FormData()
+        for index, data in enumerate(files):
+            form.add_field("file", data, filename=f"{index}.pdf")
+        async with TestClient(TestServer(api.create_app(contract=object()))) as client:
+            response = await client.post("/verify/batch", data=form)
+            return response.status, await response.json() if response.status == 200 else None
+
+    return (*asyncio.run(post()), len(hashed))
+
+
+def test_multipart_batch_hashes_every_part(monkeypatch):
+    status, body, hashed = post_batch(monkeypatch, [b"%PDF-1 a", b"%PDF-1 b"])
+
+    assert status == 200
+    assert [cert["cert_id"] for cert in body["certificates"]] == [
+        hashlib.sha256(b"%PDF-1 a").hexdigest(), hashlib.sha256(b"%PDF-1 b").hexdigest(),
+    ]
+    assert hashed == 2
+
+
+def test_multipart_batch_over_the_limit_is_rejected_before_hashing_the_excess(monkeypatch):
+    monkeypatch.setattr(api, "MAX_BATCH", 2)
+
+    status, _, hashed = post_batch(monkeypatch, [b"a", b"b", b"c", b"d"])
+
+    assert status == 413
+    assert hashed == 2
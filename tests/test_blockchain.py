@@ -0,0 +1,80 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+from web3 import Web3
+
+import blockchain
+
+VALID_ID = "ab" * 32
+ARTIFACT = os.path.join(os.path.dirname(__file__), os.pardir, "build", "contracts", "CertificateRegistry.json")
+
+
+def fake_lookup(known: set):
+    def lookup(contract, cert_ids, chunk_size=200):
+        return [{**blockchain.missing_certificate(cert_id), "exists": cert_id in known} for cert_id in cert_ids]
+    return lookup
+
+
+def test_verify_many_mixes_hex_and_non_hex_ids_in_compact_mode(monkeypatch):
+    monkeypatch.setenv("CERTIFICATE_STORAGE", blockchain.COMPACT_STORAGE)
+    monkeypatch.setattr(blockchain, "verify_compact_certificates", fake_lookup({VALID_ID}))
+    monkeypatch.setattr(blockchain, "_verify_string_certificates", fake_lookup(set()))
+    contract = SimpleNamespace(abi=[{"type": "function", "name": "verifyCompactCertificates"}])
+
+    certs = blockchain._verify_many(contract, [VALID_ID, "not-an-id"])
+
+    assert [cert["cert_id"] for cert in certs] == [VALID_ID, "not-an-id"]
+    assert [cert["exists"] for cert in certs] == [True, False]
+
+
+def test_deployment_block_bisects_to_the_first_block_with_code(monkeypatch):
+    monkeypatch.setattr(blockchain, "_deployment_blocks", {})
+    probed = []
+
+    def get_code(address, block):
+        probed.append(block)
+        return b"\x60" if block >= 37 else b""
+
+    eth = SimpleNamespace(block_number=1000, get_code=get_code)
+    contract = SimpleNamespace(address="0xA", w3=SimpleNamespace(eth=eth))
+
+    assert blockchain.deployment_block(contract) == 37
+    assert len(probed) <= 10
+    assert blockchain.deployment_block(contract) == 37
+    assert len(probed) <= 10
+
+
+def test_compact_issue_with_an_older_abi_asks_for_a_recompile(monkeypatch):
+    monkeypatch.setenv("CERTIFICATE_STORAGE", blockchain.COMPACT_STORAGE)
+    contract = SimpleNamespace(abi=[{"type": "function", "name": "issueCertificate"}])
+
+    with pytest.raises(RuntimeError, match="truffle compile"):
+        blockchain.issue_call(contract, VALID_ID, "cid", "uid", "name", "course", "org")
+
+
+def test_revoking_anchored_certificates_with_an_older_abi_asks_for_a_recompile():
+    contract = SimpleNamespace(abi=[{"type": "function", "name": "revokeCertificate"}])
+    anchored = {"cert_id": VALID_ID, "layout": blockchain.MERKLE_STORAGE, "root": "cd" * 32}
+
+    with pytest.raises(RuntimeError, match="revokeAnchoredCertificates"):
+        blockchain.revoke_calls(contract, [anchored])
+
+
+def test_verify_many_falls_back_to_verify_certificate_without_the_batch_function(monkeypatch):
+    # The ABI lacks verifyCertificates and the compact/Merkle functions, as in artifacts predating them.
+    abi = [item for item in blockchain.load_contract_abi(ARTIFACT) if item.get("name") != "verifyCertificates"]
+    contract = Web3().eth.contract(address="0x" + "11" * 20, abi=abi)
+    called = []
+
+    def call_many(w3, calls):
+        called.extend(call.fn_name for call in calls)
+        return [(call.args[0] == VALID_ID, "uid", "", "", "", "cid", blockchain.ZERO_ADDRESS, False, 0)
+                for call in calls]
+
+    monkeypatch.setattr(blockchain, "call_many", call_many)
+
+    certs = blockchain.verify_certificates(contract, [VALID_ID, "not-an-id"])
+
+    assert called == ["verifyCertificate", "verifyCertificate"]
+    assert [cert["exists"] for cert in certs] == [True, False]
@@ -0,0 +1,38 @@
+import hashlib
+
+import pytest
+
+from bloom import BloomFilter
+
+
+def cert_ids(start: int, count: int) -> list:
+    # Deterministic stand-ins for SHA-256 certificate IDs, so the rate check cannot flake.
+    return [hashlib.sha256(i.to_bytes(8, "big")).hexdigest() for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize("error_rate", [0.01, 0.001])
+def test_no_false_negatives_and_false_positives_near_the_target(error_rate):
+    issued = cert_ids(0, 20_000)
+    bloom = BloomFilter(len(issued), error_rate)
+    for cert_id in issued:
+        bloom.add(cert_id)
+
+    assert all(cert_id in bloom for cert_id in issued)
+    probes = cert_ids(len(issued), 100_000)
+    false_positives = sum(cert_id in bloom for cert_id in probes)
+    assert false_positives / len(probes) < 2 * error_rate
+
+
+def test_saved_filter_loads_with_the_same_members(tmp_path):
+    issued = cert_ids(0, 1000)
+    bloom = BloomFilter(len(issued), 0.01)
+    for cert_id in issued:
+        bloom.add(cert_id)
+    path = str(tmp_path / "issued_ids.bloom")
+
+    bloom.save(path, block=42)
+    loaded, header = BloomFilter.load(path)
+
+    assert header["block"] == 42
+    assert loaded.count == bloom.count
+    assert all(cert_id in loaded for cert_id in issued)
@@ -0,0 +1,40 @@
+from io import BytesIO
+
+import pytest
+
+from cid import CHUNK_SIZE, cid_to_digest, compute_cid, compute_stream_cid, digest_to_cid
+
+# CIDs `ipfs add` assigns (`--cid-version 1` uses raw leaves).
+VECTORS = [
+    (b"", "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH",
+     "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"),
+    (b"hello world", "Qmf412jQZiuVUtdgnB36FXFX7xg5V6KEbSJ4dpQuhkLyfD",
+     "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"),
+    (b"hello world\n", "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o",
+     "bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4"),
+]
+
+
+@pytest.mark.parametrize("data, cid_v0, cid_v1", VECTORS)
+def test_compute_cid_matches_ipfs_add(data, cid_v0, cid_v1):
+    assert compute_cid(data) == cid_v0
+    assert compute_cid(data, 1) == cid_v1
+
+
+def test_streamed_multi_chunk_cid_matches_in_memory_one():
+    data = bytes(range(256)) * (CHUNK_SIZE // 256 * 3 + 7)
+
+    for version in (0, 1):
+        assert compute_stream_cid(BytesIO(data), version) == compute_cid(data, version)
+    assert compute_cid(data, 1).startswith("bafybei")
+
+
+def test_digest_round_trips_through_cid_v0():
+    cid = compute_cid(b"hello world")
+
+    assert digest_to_cid(cid_to_digest(cid)) == cid
+
+
+def test_raw_leaf_cids_cannot_be_stored_compactly():
+    with pytest.raises(ValueError, match="dag-pb"):
+        cid_to_digest(compute_cid(b"hello world", 1))
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import indexer
+from merkle import MerkleTree, ProofStore, hash_leaf
+
+ROOT_OWNER = "0x0000000000000000000000000000000000000001"
+
+
+def fake_contract(address: str, block_number: int):
+    eth = SimpleNamespace(block_number=block_number, get_block=lambda block: {"timestamp": 1000 + block})
+    return SimpleNamespace(address=address, w3=SimpleNamespace(eth=eth))
+
+
+def anchored_tree(cert_ids: list):
+    records = [{"cert_id": cert_id, "cid": "cid", "uid": cert_id[:4], "name": "Omar", "course": "Chain",
+                "org": "Org"} for cert_id in cert_ids]
+    return MerkleTree([hash_leaf(bytes.fromhex(cert_id)) for cert_id in cert_ids]), records
+
+
+def test_anchored_certificates_are_indexed_once_their_proofs_arrive(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROOF_DB", str(tmp_path / "proofs.db"))
+    monkeypatch.setattr(indexer, "verify_certificates", lambda contract, cert_ids: [])
+    cert_ids = ["aa" * 32, "bb" * 32]
+    tree, records = anchored_tree(cert_ids)
+    events = [
+        {"event": "RootAnchored", "blockNumber": 1, "args": {"root": tree.root, "issuer": ROOT_OWNER}},
+        {"event": "AnchoredCertificateRevoked", "blockNumber": 2, "args": {"certificateId": bytes.fromhex(cert_ids[1])}},
+    ]
+    monkeypatch.setattr(indexer, "fetch_registry_events", lambda contract, start, end, names: events)
+    index = indexer.CertificateIndex(fake_contract("0xA", 2), str(tmp_path / "index.db"))
+
+    index.sync()
+    assert index.count() == 0
+
+    ProofStore().add(tree, records)
+    index.sync()
+    assert index.count() == 2
+    assert index.get(cert_ids[0])["issuer"] == ROOT_OWNER
+    assert index.count(revoked=True) == 1
+
+
+def test_index_is_reset_when_the_contract_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROOF_DB", str(tmp_path / "proofs.db"))
+    monkeypatch.setattr(indexer, "verify_certificates", lambda contract, cert_ids: [])
+    cert_id = "cc" * 32
+    tree, records = anchored_tree([cert_id])
+    ProofStore().add(tree, records)
+    events = [{"event": "RootAnchored", "blockNumber": 5, "args": {"root": tree.root, "issuer": ROOT_OWNER}}]
+    monkeypatch.setattr(indexer, "fetch_registry_events", lambda contract, start, end, names: events)
+    path = str(tmp_path / "index.db")
+
+    index = indexer.CertificateIndex(fake_contract("0xA", 5), path)
+    index.sync()
+    assert (index.count(), index.last_block()) == (1, 5)
+
+    redeployed = indexer.CertificateIndex(fake_contract("0xB", 5), path)
+    assert (redeployed.count(), redeployed.last_block()) == (0, -1)
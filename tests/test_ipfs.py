@@ -0,0 +1,17 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import ipfs
+
+LOGO = os.path.join(os.path.dirname(__file__), os.pardir, "images", "Cairo_University.png")
+
+
+def test_concurrent_renders_with_a_logo_match_serial_ones():
+    rows = [(str(uid), "Ann", "Blockchain") for uid in range(32)]
+    serial = [ipfs.render_certificate(*row, LOGO) for row in rows[:4]]
+
+    with ThreadPoolExecutor(8) as pool:
+        rendered = list(pool.map(lambda row: ipfs.render_certificate(*row, LOGO), rows))
+
+    assert rendered[:4] == serial
+    assert len(set(rendered)) == len(rows)
@@ -0,0 +1,26 @@
+import threading
+
+from jobs import JobQueue, ISSUE_JOB, RUNNING
+
+
+def test_concurrent_workers_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    submitted = {queue.submit(ISSUE_JOB, {"uid": str(i)}) for i in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def work(worker):
+        own = JobQueue(path)
+        while (job := own.claim(worker)) is not None:
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(submitted)
+    assert queue.count(RUNNING) == 40
+    assert queue.claim("late") is None
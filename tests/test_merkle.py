@@ -0,0 +1,57 @@
+import pytest
+
+from merkle import MerkleTree, ProofStore, compute_root, hash_leaf, hash_node, verify_proof
+
+
+def leaves(count: int) -> list:
+    return [hash_leaf(i.to_bytes(4, "big")) for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 17, 100])
+def test_every_proof_folds_up_to_the_root(count):
+    tree = MerkleTree(leaves(count))
+
+    for index, leaf in enumerate(leaves(count)):
+        assert verify_proof(leaf, tree.proof(index), tree.root)
+
+
+def test_tampered_leaf_or_proof_is_rejected():
+    items = leaves(9)
+    tree = MerkleTree(items)
+    proof = tree.proof(4)
+
+    assert not verify_proof(hash_leaf(b"forged"), proof, tree.root)
+    assert not verify_proof(items[4], proof[:-1], tree.root)
+    assert not verify_proof(items[4], [bytes(32)] + proof[1:], tree.root)
+    assert not verify_proof(items[4], tree.proof(5), tree.root)
+
+
+def test_an_inner_node_cannot_pass_as_a_leaf():
+    items = leaves(4)
+    tree = MerkleTree(items)
+    inner, sibling = hash_node(items[0], items[1]), hash_node(items[2], items[3])
+
+    assert compute_root(inner, [sibling]) == tree.root
+    # Presenting the inner node's bytes as leaf data hashes them with the leaf prefix.
+    assert not verify_proof(hash_leaf(inner), [sibling], tree.root)
+
+
+def test_empty_tree_is_refused():
+    with pytest.raises(ValueError):
+        MerkleTree([])
+
+
+def test_proof_store_round_trips_records_and_proofs(tmp_path):
+    records = [{"cert_id": f"{i:064x}", "cid": f"cid{i}", "uid": f"uid{i}", "name": "Ann", "course": "C",
+                "org": "O"} for i in range(5)]
+    tree = MerkleTree(leaves(5))
+    store = ProofStore(str(tmp_path / "proofs.db"))
+
+    store.add(tree, records)
+
+    found = store.get_many([record["cert_id"] for record in records] + ["missing"])
+    assert set(found) == {record["cert_id"] for record in records}
+    for index, record in enumerate(records):
+        assert found[record["cert_id"]]["proof"] == tree.proof(index)
+        assert found[record["cert_id"]]["uid"] == record["uid"]
+    assert sorted(store.cert_ids(tree.root.hex())) == sorted(record["cert_id"] for record in records)
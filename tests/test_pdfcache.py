@@ -0,0 +1,35 @@
+import os
+
+from cid import compute_cid
+from pdfcache import PdfCache
+
+
+def cached_bytes(root) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(root))
+
+
+def test_caches_sharing_a_directory_stay_within_one_budget(tmp_path):
+    root = str(tmp_path)
+    app_cache = PdfCache(fetch=None, root=root, max_bytes=3000)
+    worker_cache = PdfCache(fetch=None, root=root, max_bytes=3000)
+    blobs = [bytes([index]) * 1000 for index in range(6)]
+
+    for index, data in enumerate(blobs):
+        (app_cache if index % 2 else worker_cache).put(compute_cid(data, 1), data)
+
+    assert cached_bytes(root) <= 3000
+    assert app_cache.get(compute_cid(blobs[-1], 1)) == blobs[-1]
+
+
+def test_hits_keep_a_file_from_being_evicted(tmp_path):
+    cache = PdfCache(fetch=None, root=str(tmp_path), max_bytes=2000)
+    first, second, third = (bytes([index]) * 1000 for index in range(3))
+    cache.put(compute_cid(first, 1), first)
+    cache.put(compute_cid(second, 1), second)
+    old = os.stat(tmp_path / f"{compute_cid(second, 1)}.pdf").st_mtime - 10
+    os.utime(tmp_path / f"{compute_cid(second, 1)}.pdf", (old, old))
+
+    cache.get(compute_cid(second, 1))
+    cache.put(compute_cid(third, 1), third)
+
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{compute_cid(data, 1)}.pdf" for data in (second, third))
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from txmanager import TransactionManager, SENT
+
+SENDER = "0x0000000000000000000000000000000000000001"
+
+
+def test_underpriced_resend_keeps_waiting_for_the_original():
+    def send_transaction(tx):
+        raise ValueError("replacement transaction underpriced")
+
+    w3 = SimpleNamespace(eth=SimpleNamespace(send_transaction=send_transaction))
+    manager = TransactionManager(w3, sender=SENDER)
+    call = SimpleNamespace(build_transaction=lambda fields: dict(fields))
+    tx_id = manager.submit(call)
+    manager._update(tx_id, status=SENT, tx_hash="aa", nonce=7)
+    original = {"call": call, "nonce": 7, "tx_hash": b"\xaa", "sent_at": 0.0}
+
+    manager._send(tx_id, call, resend=original)
+
+    assert manager.status(tx_id)["status"] == SENT
+    assert manager._in_flight[tx_id]["tx_hash"] == b"\xaa"
+    assert manager._in_flight[tx_id]["sent_at"] > 0
+
+
+def test_first_send_resyncs_a_nonce_taken_by_another_process():
+    sent = []
+
+    def send_transaction(tx):
+        if tx["nonce"] < 5:
+            raise ValueError("replacement transaction underpriced")
+        sent.append(tx["nonce"])
+        return b"\xbb"
+
+    eth = SimpleNamespace(send_transaction=send_transaction, get_transaction_count=lambda sender, block: 5)
+    manager = TransactionManager(SimpleNamespace(eth=eth), sender=SENDER)
+    manager._nonce = 3
+    call = SimpleNamespace(build_transaction=lambda fields: dict(fields))
+    tx_id = manager.submit(call)
+    manager._slots.acquire()
+
+    manager._send(tx_id, call)
+
+    assert sent == [5]
+    assert manager.status(tx_id)["status"] == SENT
+    assert manager.status(tx_id)["tx_hash"] == "0xbb"
+    assert manager._nonce == 6
@@ -0,0 +1,206 @@
+import time
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+from metrics import observe, inc, gauge
+
+QUEUED, SENT, CONFIRMED, REVERTED, FAILED = "queued", "sent", "confirmed", "reverted", "failed"
+DONE_STATES = (CONFIRMED, REVERTED, FAILED)
+
+
+class TransactionManager:
+    """Pipelines contract transactions from one sender without waiting on each receipt.
+
+    Nonces are assigned locally, so up to ``max_in_flight`` transactions are
+    outstanding at once. A single receipt poller checks all of them with one
+    JSON-RPC batch per interval, re-sends transactions that stay unmined past
+    ``resend_after`` seconds, and retries send failures with backoff. The UI
+    polls ``recent`` for the last ``history`` records and their statuses.
+    Nonce errors resync the counter from the node, so other processes may
+    share the sender.
+    """
+
+    def __init__(self, w3, sender: str = None, max_in_flight: int = 64, max_retries: int = 3,
+                 poll_interval: float = 0.5, resend_after: float = 30.0, history: int = 1000):
+        self.w3 = w3
+        self.sender = sender or w3.eth.accounts[0]
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+        self.resend_after = resend_after
+        self.history = history
+        self._records = OrderedDict()
+        self._callbacks = {}
+        self._in_flight = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._nonce = None
+        self._stopping = threading.Event()
+        self._threads = []
+        gauge("tx_in_flight", lambda: len(self._in_flight))
+
+    def start(self) -> "TransactionManager":
+        if not self._threads:
+            self._nonce = self.w3.eth.get_transaction_count(self.sender, "pending")
+            for target in (self._send_loop, self._receipt_loop):
+                thread = threading.Thread(target=target, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, call, label: str = None, on_done=None) -> int:
+        """Queues a ContractFunction call and returns a local transaction ID."""
+        tx_id = next(self._ids)
+        with self._lock:
+            self._records[tx_id] = {"id": tx_id, "label": label, "status": QUEUED, "attempts": 0,
+                                    "tx_hash": None, "nonce": None, "error": None}
+            if on_done:
+                self._callbacks[tx_id] = on_done
+            while len(self._records) > self.history:
+                oldest = next(iter(self._records))
+                if self._records[oldest]["status"] not in DONE_STATES:
+                    break
+                self._records.popitem(last=False)
+        self._queue.put((tx_id, call))
+        return tx_id
+
+    def status(self, tx_id: int) -> dict:
+        with self._lock:
+            return dict(self._records[tx_id])
+
+    def recent(self, limit: int = 50) -> list:
+        with self._lock:
+            return [dict(record) for record in list(self._records.values())[-limit:]][::-1]
+
+    def wait(self, tx_ids: list, timeout: float = None) -> list:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            statuses = [self.status(tx_id) for tx_id in tx_ids]
+            if all(s["status"] in DONE_STATES for s in statuses):
+                return statuses
+            if deadline is not None and time.monotonic() > deadline:
+                return statuses
+            time.sleep(self.poll_interval / 2)
+
+    def _update(self, tx_id: int, **fields) -> None:
+        with self._lock:
+            record = self._records[tx_id]
+            record.update(fields)
+            snapshot = dict(record)
+            callback = self._callbacks.pop(tx_id, None) if record["status"] in DONE_STATES else None
+        if callback:
+            callback(snapshot)
+
+    def _send_loop(self) -> None:
+        while not self._stopping.is_set():
+            item = self._queue.get()
+            if item is None:
+                return
+            tx_id, call = item
+            self._slots.acquire()
+            self._send(tx_id, call)
+
+    def _send(self, tx_id: int, call, resend: dict = None) -> None:
+        nonce = resend["nonce"] if resend else None
+        for attempt in range(1, self.max_retries + 1):
+            with self._lock:
+                if nonce is None:
+                    nonce = self._nonce
+                    self._nonce += 1
+            start = time.perf_counter()
+            try:
+                tx = call.build_transaction({"from": self.sender, "nonce": nonce})
+                tx_hash = self.w3.eth.send_transaction(tx)
+                observe("tx_send", time.perf_counter() - start)
+            except Exception as e:
+                inc("tx_send_errors")
+                message = str(e).lower()
+                if resend and ("nonce" in message or "already known" in message or "underpriced" in message):
+                    # The original broadcast got mined or is still pooled (a same-price resend is
+                    # refused as an underpriced replacement); keep waiting for its receipt.
+                    with self._lock:
+                        self._in_flight[tx_id] = {**resend, "sent_at": time.monotonic()}
+                    return
+                if "nonce" in message or "underpriced" in message or "already known" in message:
+                    # Another process sending from this account took the nonce; take a fresh one from the node.
+                    with self._lock:
+                        self._nonce = max(self._nonce, self.w3.eth.get_transaction_count(self.sender, "pending"))
+                    nonce = None
+                elif "revert" in message:
+                    self._fill_nonce(nonce)
+                    self._finish(tx_id, status=REVERTED, attempts=attempt, error=str(e))
+                    return
+                if attempt == self.max_retries:
+                    if nonce is not None:
+                        self._fill_nonce(nonce)
+                    self._finish(tx_id, status=FAILED, attempts=attempt, error=str(e))
+                    return
+                time.sleep(0.2 * 2 ** attempt)
+                continue
+
+            with self._lock:
+                self._in_flight[tx_id] = {"call": call, "nonce": nonce, "tx_hash": tx_hash, "sent_at": time.monotonic()}
+            self._update(tx_id, status=SENT, attempts=attempt, tx_hash="0x" + tx_hash.hex(), nonce=nonce)
+            return
+
+    def _fill_nonce(self, nonce: int) -> None:
+        """Sends a zero-value self transfer so later nonces are not stuck behind a gap."""
+        try:
+            self.w3.eth.send_transaction({"from": self.sender, "to": self.sender, "value": 0, "nonce": nonce})
+        except Exception:
+            # The nonce was never consumed or is already taken; resync instead.
+            with self._lock:
+                self._nonce = self.w3.eth.get_transaction_count(self.sender, "pending")
+
+    def _finish(self, tx_id: int, **fields) -> None:
+        with self._lock:
+            entry = self._in_flight.pop(tx_id, None)
+        if entry is not None:
+            observe("tx_confirm", time.monotonic() - entry["sent_at"])
+        inc("transactions", status=fields["status"])
+        self._slots.release()
+        self._update(tx_id, **fields)
+
+    def _receipt_loop(self) -> None:
+        while not self._stopping.wait(self.poll_interval):
+            with self._lock:
+                pending = list(self._in_flight.items())
+            if not pending:
+                continue
+            try:
+                receipts = self._fetch_receipts([entry["tx_hash"] for _, entry in pending])
+            except Exception:
+                continue
+            for (tx_id, entry), receipt in zip(pending, receipts):
+                if receipt is not None:
+                    status = CONFIRMED if int(receipt["status"], 16) == 1 else REVERTED
+                    self._finish(tx_id, status=status, block=int(receipt["blockNumber"], 16),
+                                 gas_used=int(receipt["gasUsed"], 16))
+                elif time.monotonic() - entry["sent_at"] > self.resend_after:
+                    # Re-broadcast with the same nonce so it cannot be mined twice.
+                    with self._lock:
+                        self._in_flight.pop(tx_id, None)
+                    self._send(tx_id, entry["call"], resend=entry)
+
+    def _fetch_receipts(self, tx_hashes: list) -> list:
+        """Looks up all receipts in one JSON-RPC batch; unmined ones come back as None.
+
+        Goes straight to the provider because web3's formatted batch raises
+        TransactionNotFound for the whole batch on a single null receipt.
+        """
+        responses = self.w3.provider.make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash.to_0x_hex()]) for tx_hash in tx_hashes]
+        )
+        if not isinstance(responses, list):
+            raise ConnectionError(responses.get("error", responses))
+        return [response.get("result") for response in responses]